@@ -0,0 +1,83 @@
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from glob import glob
+from logging import getLogger
+
+import arcade
+
+logger = getLogger(__name__)
+
+# Cantidad máxima de recursos en memoria antes de descartar los menos usados
+TEXTURE_CACHE_SIZE = 64
+SOUND_CACHE_SIZE = 32
+# Hilos que decodifican recursos en segundo plano
+PRELOAD_WORKERS = 4
+
+# Cada textura y sonido se carga una sola vez y se comparte entre vistas y objetos
+@lru_cache(maxsize=TEXTURE_CACHE_SIZE)
+def get_texture(path: str) -> arcade.Texture:
+    logger.debug("Cargando textura %s", path)
+    return arcade.load_texture(path)
+
+@lru_cache(maxsize=SOUND_CACHE_SIZE)
+def get_sound(path: str) -> arcade.Sound:
+    logger.debug("Cargando sonido %s", path)
+    return arcade.load_sound(path)
+
+def preload_jobs(image_pattern: str, sound_pattern: str, exclude: tuple[str, ...] = ()) -> list[tuple]:
+    excluded = set(os.path.normpath(path) for path in exclude)
+    jobs = [(get_texture, path) for path in glob(image_pattern)]
+    jobs += [(get_sound, path) for path in glob(sound_pattern)]
+    jobs = [job for job in jobs if os.path.normpath(job[1]) not in excluded]
+    # Los archivos más grandes primero, así el más lento no queda para el final
+    jobs.sort(key=lambda job: (-os.path.getsize(job[1]), job[1]))
+    return jobs
+
+# Avance de una carga en segundo plano, future se completa cuando están todos los recursos
+class Preload:
+    def __init__(self, total: int):
+        self.total = total
+        self.loaded = 0
+        self.future: Future = Future()
+        self.lock = threading.Lock()
+        if total == 0:
+            self.future.set_result(None)
+
+    @property
+    def progress(self) -> float:
+        return self.loaded / self.total if self.total else 1.0
+
+    def on_job_done(self, job: Future):
+        with self.lock:
+            self.loaded += 1
+            if self.future.done():
+                return
+            if job.exception() is not None:
+                self.future.set_exception(job.exception())
+            elif self.loaded == self.total:
+                self.future.set_result(None)
+
+# Cargar por adelantado todos los recursos del juego en un pool de hilos, para que la ventana pueda dibujar mientras tanto.
+# Las texturas se leen del disco y los sonidos se decodifican fuera del hilo de la ventana;
+# cada vista puede esperar a que preload.future esté listo antes de usarlos.
+def preload_async(
+    image_pattern: str = "assets/img/*.png",
+    sound_pattern: str = "assets/msc/*.mp3",
+    exclude: tuple[str, ...] = (),
+    max_workers: int = PRELOAD_WORKERS,
+) -> Preload:
+    jobs = preload_jobs(image_pattern, sound_pattern, exclude)
+    preload = Preload(len(jobs))
+    executor = ThreadPoolExecutor(max_workers, thread_name_prefix="assets")
+    for loader, path in jobs:
+        executor.submit(loader, path).add_done_callback(preload.on_job_done)
+    # Los hilos terminan solos cuando no queda nada por cargar
+    executor.shutdown(wait=False)
+    logger.debug("Cargando %d recursos en segundo plano", len(jobs))
+    return preload
+
+def clear():
+    get_texture.cache_clear()
+    get_sound.cache_clear()
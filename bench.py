@@ -0,0 +1,259 @@
+import argparse
+import json
+import math
+import platform
+import statistics
+import time
+from logging import getLogger
+
+import pymunk
+
+from entities import BLOCK_SPECS, PIG_SPEC
+from game_logic import FLOOR_Y, HEIGHT, WIDTH, ImpulseVector
+from generator import is_stable
+from levels import BlockTemplate, LevelTemplate, load_level_pack
+from profiler import Profiler
+from simulation import Simulation
+
+logger = getLogger(__name__)
+
+# Tiro de referencia para medir cuánto tarda cada nivel en quedarse quieto
+REFERENCE_SHOT = ImpulseVector(0.45, 100)
+# Tiempo máximo de simulación para cada fase de espera
+MAX_SETTLE_TIME = 30.0
+# Zona del nivel sintético, a la derecha de la resortera
+STRESS_LEFT = 250
+STRESS_GAP = 0.5
+STRESS_MARGIN = 8
+# Con más de unas 12 filas la pared se comprime por su propio peso más de lo que acepta is_stable
+STRESS_SIZES = ["30x5", "50x10", "80x15"]
+
+# Nivel sintético que se sostiene solo: una pared de vigas apoyadas en el piso y los cerdos arriba.
+# Las filas van pegadas para que la pared no se asiente. Si la última fila queda incompleta, sus vigas
+# van a la izquierda, y los cerdos se apartan STRESS_MARGIN de cada borde para no rodar por él.
+def stress_template(blocks: int, pigs: int) -> LevelTemplate:
+    beam = BLOCK_SPECS["beam"]
+    radius = PIG_SPEC.radius
+    beam_pitch = beam.width + STRESS_GAP
+    pig_pitch = radius * 2 + STRESS_GAP
+    beams_per_row = int((WIDTH - STRESS_LEFT) // beam_pitch)
+    full_rows, rest = divmod(blocks, beams_per_row)
+
+    block_templates = []
+    for i in range(blocks):
+        row, column = divmod(i, beams_per_row)
+        x = STRESS_LEFT + (column + 0.5) * beam_pitch
+        y = FLOOR_Y + (row + 0.5) * beam.height
+        block_templates.append(BlockTemplate(beam, x, y))
+
+    # Tramos planos arriba de la pared: (izquierda, derecha, altura)
+    full_top = FLOOR_Y + full_rows * beam.height
+    wall_right = STRESS_LEFT + beams_per_row * beam_pitch
+    step_right = STRESS_LEFT + rest * beam_pitch
+    if rest:
+        surfaces = [(STRESS_LEFT, step_right, full_top + beam.height), (step_right, wall_right, full_top)]
+    else:
+        surfaces = [(STRESS_LEFT, wall_right, full_top)]
+
+    pig_positions = []
+    for left, right, top in surfaces:
+        x = left + STRESS_MARGIN + radius
+        while len(pig_positions) < pigs and x + radius <= right - STRESS_MARGIN:
+            pig_positions.append((x, top + radius))
+            x += pig_pitch
+    if len(pig_positions) < pigs:
+        raise ValueError(f"El nivel sintético {blocks}x{pigs} no tiene lugar para {pigs} cerdos arriba de la pared")
+    top = max([surface[2] for surface in surfaces] + [y + radius for _, y in pig_positions])
+    if top > HEIGHT:
+        raise ValueError(f"El nivel sintético {blocks}x{pigs} no entra en la pantalla ({top:.0f} > {HEIGHT})")
+    return LevelTemplate(0, tuple(block_templates), tuple(pig_positions))
+
+def parse_stress_size(size: str) -> tuple[int, int]:
+    blocks, pigs = size.lower().split("x")
+    return int(blocks), int(pigs)
+
+# Sprites de arcade como los de App, solo si se pide medir la sincronización
+def create_sprite_lists(simulation: Simulation):
+    from game_object import BLOCK_SPRITES, BIRD_SPRITES, Pig
+    from sprite_sync import BodySpriteSync, TrackedSpriteList
+
+    blocks = TrackedSpriteList()
+    pigs = TrackedSpriteList()
+    flying = TrackedSpriteList()
+    for entity in simulation.blocks:
+        blocks.append(BLOCK_SPRITES[entity.spec.name](entity))
+    for entity in simulation.pigs:
+        pigs.append(Pig(entity))
+    lists = [blocks, pigs, flying]
+
+    def on_remove(entities):
+        for sprite_list in lists:
+            for sprite in list(sprite_list):
+                if sprite.entity in entities:
+                    sprite.remove_from_sprite_lists()
+    simulation.on_remove = on_remove
+
+    def on_launch(entity):
+        flying.append(BIRD_SPRITES[entity.spec.name](entity))
+    return BodySpriteSync(simulation, lists), on_launch
+
+def summarize(samples: list[float]) -> dict:
+    if not samples:
+        return {"count": 0, "mean_us": 0.0, "p95_us": 0.0, "max_us": 0.0}
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return {
+        "count": len(samples),
+        "mean_us": statistics.fmean(samples) * 1e6,
+        "p95_us": p95 * 1e6,
+        "max_us": ordered[-1] * 1e6,
+    }
+
+# settled pide que Chipmunk duerma todos los cuerpos, así que un paso lento suelto no corta la espera.
+# Antes del tiro también se espera la gracia inicial, como en el juego
+def step_until_settled(simulation: Simulation, max_time: float) -> tuple[float, float]:
+    start_time = simulation.time
+    start = time.perf_counter()
+    simulation.wait_for_spawn()
+    while not simulation.settled and simulation.time - start_time < max_time:
+        simulation.step()
+    return simulation.time - start_time, (time.perf_counter() - start) * 1000
+
+# Una corrida: construir el nivel, esperar a que se acomode, tirar y esperar de nuevo
+# Cada paso de física cuenta como un frame del perfilador
+def run_once(template: LevelTemplate, seed: int, sprites: bool, profiler: Profiler) -> dict:
+    start = time.perf_counter()
+    simulation = Simulation(template.number, seed=seed, bird_order=["red"], template=template)
+    build_ms = (time.perf_counter() - start) * 1000
+    bodies = len(simulation.space.bodies)
+
+    profiler.attach_simulation(simulation)
+    if sprites:
+        sprite_sync, on_launch = create_sprite_lists(simulation)
+        step = simulation.step
+        sync_sprites = profiler.zone("sync_sprites", sprite_sync.sync)
+
+        def step_with_sprites(dt=None):
+            step(dt)
+            sync_sprites(1.0)
+        profiler.patch(simulation, "step", step_with_sprites)
+    profiler.instrument(simulation, "step", frame=True)
+
+    spawn_settle, spawn_settle_ms = step_until_settled(simulation, MAX_SETTLE_TIME)
+    entity = simulation.launch(REFERENCE_SHOT)
+    if sprites:
+        on_launch(entity)
+    shot_settle, shot_settle_ms = step_until_settled(simulation, MAX_SETTLE_TIME)
+    profiler.next_frame()
+    profiler.detach()
+
+    return {
+        "build_ms": build_ms,
+        "bodies": bodies,
+        "spawn_settle_s": spawn_settle,
+        "spawn_settle_ms": spawn_settle_ms,
+        "shot_settle_s": shot_settle,
+        "shot_settle_ms": shot_settle_ms,
+        "steps": simulation.steps,
+        "pigs_left": len(simulation.pigs),
+    }
+
+def bench_scenario(template: LevelTemplate, repeat: int, seed: int, sprites: bool) -> dict:
+    profiler = Profiler(window=None)
+    runs = [run_once(template, seed, sprites, profiler) for _ in range(repeat)]
+    result = {
+        "bodies": runs[0]["bodies"],
+        "steps": runs[0]["steps"],
+        "pigs_left": runs[0]["pigs_left"],
+        "build_ms": min(run["build_ms"] for run in runs),
+        "spawn_settle_s": runs[0]["spawn_settle_s"],
+        "shot_settle_s": runs[0]["shot_settle_s"],
+        "spawn_settle_ms": min(run["spawn_settle_ms"] for run in runs),
+        "shot_settle_ms": min(run["shot_settle_ms"] for run in runs),
+        "phases": {zone: summarize(times) for zone, times in profiler.zone_times.items()},
+    }
+    return result
+
+def run_benchmarks(
+    levels: list[int],
+    stress: list[str],
+    repeat: int = 3,
+    seed: int = 1,
+    sprites: bool = False,
+) -> dict:
+    pack = load_level_pack()
+    scenarios = {}
+    for number in levels:
+        scenarios[f"level-{number}"] = bench_scenario(pack[number], repeat, seed, sprites)
+    for size in stress:
+        blocks, pigs = parse_stress_size(size)
+        template = stress_template(blocks, pigs)
+        # Un nivel que se derrumba sin tiro mediría el derrumbe y no el tiro de referencia
+        if not is_stable(template, MAX_SETTLE_TIME):
+            raise ValueError(f"El nivel sintético {blocks}x{pigs} no se sostiene solo")
+        scenarios[f"stress-{blocks}x{pigs}"] = bench_scenario(template, repeat, seed, sprites)
+    return {
+        "python": platform.python_version(),
+        "pymunk": pymunk.version,
+        "machine": platform.machine(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "repeat": repeat,
+        "seed": seed,
+        "scenarios": scenarios,
+    }
+
+def print_results(results: dict):
+    for name, scenario in results["scenarios"].items():
+        print(
+            f"{name}: {scenario['bodies']} cuerpos, construcción {scenario['build_ms']:.2f} ms, "
+            f"quieto tras el tiro en {scenario['shot_settle_s']:.2f} s ({scenario['shot_settle_ms']:.0f} ms reales)"
+        )
+        for phase, stats in scenario["phases"].items():
+            print(f"    {phase:<15} media {stats['mean_us']:8.1f} us   p95 {stats['p95_us']:8.1f} us")
+
+# Comparar contra una corrida anterior, una razón mayor que 1 es más lento que antes
+def compare_results(old: dict, new: dict) -> list[tuple[str, str, float, float, float]]:
+    rows = []
+    for name, scenario in new["scenarios"].items():
+        previous = old["scenarios"].get(name)
+        if previous is None:
+            continue
+        metrics = [("build_ms", previous["build_ms"], scenario["build_ms"])]
+        metrics.append(("shot_settle_ms", previous["shot_settle_ms"], scenario["shot_settle_ms"]))
+        for phase, stats in scenario["phases"].items():
+            if phase in previous["phases"]:
+                metrics.append((f"{phase}.mean_us", previous["phases"][phase]["mean_us"], stats["mean_us"]))
+        for metric, before, after in metrics:
+            rows.append((name, metric, before, after, after / before if before else math.inf))
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Medir el rendimiento de la simulación")
+    parser.add_argument("--levels", type=int, nargs="*", help="niveles a medir (por defecto todos)")
+    parser.add_argument("--stress", nargs="*", default=STRESS_SIZES, help="niveles sintéticos BLOQUESxCERDOS")
+    parser.add_argument("--repeat", type=int, default=3, help="corridas por escenario")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--sprites", action="store_true", help="medir también la sincronización de sprites")
+    parser.add_argument("--output", help="guardar los resultados en este archivo JSON")
+    parser.add_argument("--compare", help="resultados JSON anteriores para comparar")
+    parser.add_argument("--threshold", type=float, default=1.2, help="razón a partir de la cual se marca una regresión")
+    args = parser.parse_args()
+
+    levels = args.levels if args.levels is not None else sorted(load_level_pack())
+    results = run_benchmarks(levels, args.stress, args.repeat, args.seed, args.sprites)
+    print_results(results)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            old = json.load(file)
+        print()
+        for name, metric, before, after, ratio in compare_results(old, results):
+            mark = "  <-- más lento" if ratio > args.threshold else ""
+            print(f"{name:<16} {metric:<26} {before:10.1f} -> {after:10.1f}  x{ratio:.2f}{mark}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+import argparse
+import json
+import math
+import random
+from logging import getLogger
+
+import numpy as np
+
+from entities import BIRD_SPECS
+from levels import level_numbers
+from runner import ANGLE_RANGE, MIN_IMPULSE, POWER_RANGE, LevelJob, random_shots, run_jobs
+
+logger = getLogger(__name__)
+
+SAMPLES = 2000
+# z del intervalo de confianza del 95% para la probabilidad de ganar
+CONFIDENCE_Z = 1.96
+
+# Orden de los pájaros al azar, igual que al empezar un nivel en App
+def random_bird_order(rng: random.Random) -> tuple[str, ...]:
+    bird_order = ["red", "blue", "yellow"]
+    rng.shuffle(bird_order)
+    return tuple(bird_order)
+
+# Partidas con orden de pájaros y tiros al azar, siempre las mismas para la misma semilla.
+# Solo se eligen tiros que un jugador puede hacer: un tiro imposible se pierde sin tocar nada
+# y haría ver el nivel más difícil de lo que es.
+def sample_jobs(level: int, samples: int, seed: int = 0) -> list[LevelJob]:
+    jobs = []
+    for sample in range(samples):
+        rng = random.Random(f"{seed}-{level}-{sample}")
+        bird_order = random_bird_order(rng)
+        jobs.append(LevelJob(level, sample, random_shots(rng, bird_order), bird_order))
+    return jobs
+
+# Intervalo de Wilson: no se sale de [0, 1] aunque casi todas las partidas se ganen o se pierdan
+def wilson_interval(wins: int, runs: int, z: float = CONFIDENCE_Z) -> tuple[float, float]:
+    if runs == 0:
+        return 0.0, 1.0
+    p = wins / runs
+    center = (p + z * z / (2 * runs)) / (1 + z * z / runs)
+    margin = z * math.sqrt(p * (1 - p) / runs + z * z / (4 * runs * runs)) / (1 + z * z / runs)
+    return max(0.0, center - margin), min(1.0, center + margin)
+
+# Para cada lugar en la resortera, cuántos cerdos mata en promedio cada pájaro al tirar desde ahí
+def slot_effectiveness(jobs: list[LevelJob], results: np.ndarray) -> list[dict]:
+    slots = results["shot_kills"].shape[1]
+    kills: list[dict[str, list[int]]] = [{} for _ in range(slots)]
+    for job, row in zip(jobs, results):
+        for slot in range(row["shots_fired"]):
+            kills[slot].setdefault(job.bird_order[slot], []).append(int(row["shot_kills"][slot]))
+    report = []
+    for slot, by_bird in enumerate(kills):
+        if not by_bird:
+            continue
+        means = {bird: sum(values) / len(values) for bird, values in sorted(by_bird.items())}
+        report.append({
+            "slot": slot + 1,
+            "best_bird": max(means, key=means.get),
+            "kills_per_shot": means,
+            "shots": {bird: len(values) for bird, values in sorted(by_bird.items())},
+        })
+    return report
+
+def level_report(level: int, jobs: list[LevelJob], results: np.ndarray) -> dict:
+    runs = len(results)
+    wins = int(results["won"].sum())
+    low, high = wilson_interval(wins, runs)
+    won = results[results["won"]]
+    return {
+        "level": level,
+        "runs": runs,
+        "win_probability": wins / runs if runs else 0.0,
+        "win_interval": [low, high],
+        # Pájaros usados por partida, y solo en las que se ganaron: ganar con el primero es un nivel fácil
+        "birds_used": float(results["shots_fired"].mean()) if runs else 0.0,
+        "birds_used_to_win": float(won["shots_fired"].mean()) if len(won) else None,
+        "pigs_killed": float(results["pigs_killed"].mean()) if runs else 0.0,
+        "pigs": int(results["pigs"].max()) if runs else 0,
+        "difficulty": 1 - wins / runs if runs else 1.0,
+        "slots": slot_effectiveness(jobs, results),
+    }
+
+# Estimar qué tan difícil es cada nivel jugando muchas partidas al azar en paralelo
+def estimate_difficulty(
+    levels: list[int],
+    samples: int = SAMPLES,
+    seed: int = 0,
+    max_workers: int | None = None,
+) -> list[dict]:
+    jobs_by_level = {level: sample_jobs(level, samples, seed) for level in levels}
+    jobs = [job for level in levels for job in jobs_by_level[level]]
+    results = run_jobs(jobs, max_workers)
+    reports = []
+    start = 0
+    for level in levels:
+        count = len(jobs_by_level[level])
+        reports.append(level_report(level, jobs_by_level[level], results[start:start + count]))
+        start += count
+    return reports
+
+def print_report(reports: list[dict]):
+    print(f"{'nivel':>5} {'victoria':>9} {'IC 95%':>15} {'pájaros':>8} {'para ganar':>10}  mejor pájaro por lugar")
+    for report in reports:
+        low, high = report["win_interval"]
+        to_win = report["birds_used_to_win"]
+        best = "  ".join(f"{slot['slot']}:{slot['best_bird']}" for slot in report["slots"])
+        print(
+            f"{report['level']:>5} {report['win_probability']:>9.1%} {f'{low:.1%}-{high:.1%}':>15} "
+            f"{report['birds_used']:>8.2f} {'-' if to_win is None else f'{to_win:.2f}':>10}  {best}"
+        )
+
+def main():
+    parser = argparse.ArgumentParser(description="Estimar la dificultad de cada nivel con partidas al azar")
+    parser.add_argument("--levels", type=int, nargs="*", help="niveles a medir (por defecto todos)")
+    parser.add_argument("--samples", type=int, default=SAMPLES, help="partidas por nivel")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--output", help="guardar el reporte en un archivo JSON")
+    args = parser.parse_args()
+
+    levels = args.levels if args.levels is not None else level_numbers()
+    reports = estimate_difficulty(levels, args.samples, args.seed, args.workers)
+    print_report(reports)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            sampling = {"angle_range": ANGLE_RANGE, "min_impulse": MIN_IMPULSE, "power_range": POWER_RANGE}
+            json.dump({"samples": args.samples, "seed": args.seed, "birds": sorted(BIRD_SPECS), "sampling": sampling, "levels": reports}, file, indent=2)
+        print(f"Reporte guardado en {args.output}")
+
+if __name__ == "__main__":
+    main()
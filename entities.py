@@ -0,0 +1,206 @@
+from dataclasses import dataclass
+
+import pymunk
+
+from game_logic import ImpulseVector
+
+# Tipos de colisión, solo los pares que involucran cerdos llaman a Python
+COLLISION_GROUND = 1
+COLLISION_BIRD = 2
+COLLISION_PIG = 3
+COLLISION_BLOCK = 4
+
+# Parámetros físicos de cada tipo de objeto (sin texturas ni sonidos)
+@dataclass(frozen=True)
+class BirdSpec:
+    name: str
+    mass: float = 5
+    radius: float = 12
+    max_impulse: float = 180
+    elasticity: float = 0.8
+    friction: float = 1
+    power_multiplier: float = 35
+
+@dataclass(frozen=True)
+class PigSpec:
+    mass: float = 2
+    # Mismo radio que el sprite: pig.png (388px) * 0.1 / 2 - 3
+    radius: float = 16.4
+    elasticity: float = 0.8
+    friction: float = 0.4
+    # Daño acumulado con el que muere el cerdo, un solo golpe de 1000 lo sigue matando
+    health: float = 700
+
+@dataclass(frozen=True)
+class BlockSpec:
+    name: str
+    width: float
+    height: float
+    mass: float = 2
+    elasticity: float = 0.8
+    friction: float = 1
+
+BIRD_SPECS = {
+    "red": BirdSpec("red", 4.5),
+    "blue": BirdSpec("blue", 4.5),
+    "yellow": BirdSpec("yellow", 4.5),
+}
+PIG_SPEC = PigSpec()
+# Tamaños de column.png y beam.png
+BLOCK_SPECS = {
+    "column": BlockSpec("column", 25, 90),
+    "beam": BlockSpec("beam", 83, 21),
+}
+
+# Un objeto de la simulación. Los parámetros del tipo se comparten a través de spec y cada objeto
+# guarda solo su estado; __slots__ evita un diccionario por objeto en niveles con miles de bloques.
+class Entity:
+    __slots__ = (
+        "kind",
+        "spec",
+        "body",
+        "shape",
+        "in_space",
+        "owner",
+        "has_used_power",
+        "damage",
+        "impulse_vector",
+        "previous_x",
+        "previous_y",
+        "previous_angle",
+    )
+
+    def __init__(self, kind: str, spec, body: pymunk.Body, shape: pymunk.Shape):
+        self.kind = kind
+        self.spec = spec
+        self.body = body
+        self.shape = shape
+        self.in_space = False
+        # Lista de la simulación que contiene al objeto mientras está en el espacio
+        self.owner: list | None = None
+        self.has_used_power = False
+        self.damage = 0.0
+        self.impulse_vector: ImpulseVector | None = None
+        # Estado del paso anterior para interpolar lo que se dibuja entre dos pasos de física
+        self.reset_interpolation()
+
+    def reset_interpolation(self):
+        self.previous_x, self.previous_y = self.body.position
+        self.previous_angle = self.body.angle
+
+    def interpolated(self, alpha: float) -> tuple[float, float, float]:
+        x, y = self.body.position
+        return (
+            self.previous_x + (x - self.previous_x) * alpha,
+            self.previous_y + (y - self.previous_y) * alpha,
+            self.previous_angle + (self.body.angle - self.previous_angle) * alpha,
+        )
+
+def create_bird(spec: BirdSpec, x: float, y: float) -> Entity:
+    moment = pymunk.moment_for_circle(spec.mass, 0, spec.radius)
+    body = pymunk.Body(spec.mass, moment)
+    body.position = (x, y)
+    shape = pymunk.Circle(body, spec.radius)
+    shape.elasticity = spec.elasticity
+    shape.friction = spec.friction
+    shape.collision_type = COLLISION_BIRD
+    return Entity("bird", spec, body, shape)
+
+def create_pig(x: float, y: float, spec: PigSpec = PIG_SPEC) -> Entity:
+    moment = pymunk.moment_for_circle(spec.mass, 0, spec.radius)
+    body = pymunk.Body(spec.mass, moment)
+    body.position = (x, y)
+    shape = pymunk.Circle(body, spec.radius)
+    shape.elasticity = spec.elasticity
+    shape.friction = spec.friction
+    shape.collision_type = COLLISION_PIG
+    return Entity("pig", spec, body, shape)
+
+def create_block(spec: BlockSpec, x: float, y: float) -> Entity:
+    moment = pymunk.moment_for_box(spec.mass, (spec.width, spec.height))
+    body = pymunk.Body(spec.mass, moment)
+    body.position = (x, y)
+    shape = pymunk.Poly.create_box(body, (spec.width, spec.height))
+    shape.elasticity = spec.elasticity
+    shape.friction = spec.friction
+    shape.collision_type = COLLISION_BLOCK
+    return Entity("block", spec, body, shape)
+
+# Chipmunk guarda en cada cuerpo una velocidad de corrección del último paso que Pymunk no expone.
+# Solo se reinicia al integrar la posición, así que se da un paso en un espacio vacío sin gravedad
+# (la posición y velocidad que cambien se sobrescriben después con el estado guardado)
+def clear_solver_bias(bodies: list[pymunk.Body], scratch: pymunk.Space | None = None):
+    if scratch is None:
+        scratch = pymunk.Space()
+    added = [body for body in bodies if body.space is None]
+    if not added:
+        return
+    scratch.add(*added)
+    scratch.step(1 / 60.0)
+    scratch.remove(*added)
+
+def reset_entity(entity: Entity, x: float, y: float):
+    body = entity.body
+    body.position = (x, y)
+    body.velocity = (0, 0)
+    body.angle = 0
+    body.angular_velocity = 0
+    body.force = (0, 0)
+    body.torque = 0
+    entity.in_space = False
+    entity.owner = None
+    entity.has_used_power = False
+    entity.damage = 0.0
+    entity.impulse_vector = None
+    entity.reset_interpolation()
+
+CONSTRUCTORS = {
+    "bird": create_bird,
+    "pig": lambda spec, x, y: create_pig(x, y, spec),
+    "block": create_block,
+}
+
+# Objetos que salieron de la simulación, listos para volver a usarse con otro cuerpo en el mismo lugar
+# de memoria. Se separan por tipo y parámetros porque la forma y la masa no se cambian al reusarlos.
+class EntityPool:
+    def __init__(self):
+        self.free: dict[tuple, dict[Entity, None]] = {}
+        # Espacio auxiliar para borrar la corrección del solver de los cuerpos que vuelven al pool
+        self.scratch = pymunk.Space()
+
+    def acquire(self, kind: str, spec, x: float, y: float) -> Entity:
+        free = self.free.get((kind, spec))
+        if not free:
+            return CONSTRUCTORS[kind](spec, x, y)
+        entity, _ = free.popitem()
+        reset_entity(entity, x, y)
+        return entity
+
+    # Crear de antemano los objetos que se van a necesitar en medio de la partida.
+    # Devuelve todos los objetos libres de ese tipo, cualquiera puede salir en el próximo acquire.
+    def reserve(self, kind: str, spec, count: int) -> list[Entity]:
+        free = self.free.setdefault((kind, spec), {})
+        while len(free) < count:
+            free[CONSTRUCTORS[kind](spec, 0, 0)] = None
+        return list(free)
+
+    def release(self, entities: list[Entity]):
+        entities = [entity for entity in entities if not entity.in_space]
+        clear_solver_bias([entity.body for entity in entities], self.scratch)
+        for entity in entities:
+            self.free.setdefault((entity.kind, entity.spec), {})[entity] = None
+
+    # Un objeto que vuelve a la simulación, por ejemplo al restaurar un estado, deja de estar libre
+    def discard(self, entities):
+        for entity in entities:
+            free = self.free.get((entity.kind, entity.spec))
+            if free:
+                free.pop(entity, None)
+
+    def __len__(self) -> int:
+        return sum(len(free) for free in self.free.values())
+
+# Impulso que recibe un pájaro al ser lanzado
+def get_launch_impulse(spec: BirdSpec, impulse_vector: ImpulseVector) -> pymunk.Vec2d:
+    impulse = min(spec.max_impulse, impulse_vector.impulse) * spec.power_multiplier
+    return (impulse * pymunk.Vec2d(1, 0)).rotated(impulse_vector.angle)
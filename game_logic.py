@@ -4,6 +4,13 @@ from logging import getLogger
 
 logger = getLogger(__name__)
 
+WIDTH = 1000
+HEIGHT = 500
+GRAVITY = -500
+MAX_DRAG_DISTANCE = 100
+# Altura del piso de la simulación
+FLOOR_Y = 10
+
 @dataclass
 class ImpulseVector:
     angle: float
@@ -14,6 +21,10 @@ class Point2D:
     x: float = 0
     y: float = 0
 
+SLING_POS = Point2D(160, 30)
+# Punto desde el que se estira la cuerda del tirachinas
+SLING_ANCHOR = Point2D(SLING_POS.x - 10, SLING_POS.y + 45)
+
 def get_angle_radians(point_a: Point2D, point_b: Point2D) -> float:
     return math.atan2(point_b.y - point_a.y, point_b.x - point_a.x)
 
@@ -24,3 +35,22 @@ def get_impulse_vector(start_point: Point2D, end_point: Point2D) -> ImpulseVecto
     angle = get_angle_radians(start_point, end_point)
     distance = get_distance(start_point, end_point)
     return ImpulseVector(angle, distance)
+
+# Posición en la que queda el pájaro al soltarlo para producir el impulso dado
+def get_launch_point(impulse_vector: ImpulseVector) -> Point2D:
+    return Point2D(
+        SLING_ANCHOR.x - math.cos(impulse_vector.angle) * impulse_vector.impulse,
+        SLING_ANCHOR.y - math.sin(impulse_vector.angle) * impulse_vector.impulse,
+    )
+
+# Impulso más grande que puede lograr un jugador con un ángulo: el punto arrastrado no puede salir
+# del círculo de MAX_DRAG_DISTANCE alrededor de SLING_POS ni quedar debajo del piso
+def max_impulse(angle: float, radius: float = 0) -> float:
+    dx, dy = -math.cos(angle), -math.sin(angle)
+    # Distancia desde el anclaje hasta el borde del círculo en esa dirección
+    ox, oy = SLING_ANCHOR.x - SLING_POS.x, SLING_ANCHOR.y - SLING_POS.y
+    b = ox * dx + oy * dy
+    limit = -b + math.sqrt(b * b - (ox * ox + oy * oy - MAX_DRAG_DISTANCE ** 2))
+    if dy < 0:
+        limit = min(limit, (SLING_ANCHOR.y - FLOOR_Y - radius) / -dy)
+    return max(0.0, limit)
@@ -1,197 +1,98 @@
 import arcade
 import pymunk
-from game_logic import ImpulseVector
+from assets import get_texture
+from entities import Entity
+
+# Sprite de un objeto de la simulación. El cuerpo y la forma se leen del objeto en lugar de
+# copiarse en cada sprite, y lo que es igual para todo el tipo (sonidos) va en la clase.
+class EntitySprite(arcade.Sprite):
+    def __init__(self, texture: arcade.Texture, scale: float, entity: Entity):
+        super().__init__(texture, scale)
+        self.entity = entity
+        self.center_x = entity.body.position.x
+        self.center_y = entity.body.position.y
+
+    @property
+    def body(self) -> pymunk.Body:
+        return self.entity.body
+
+    @property
+    def shape(self) -> pymunk.Shape:
+        return self.entity.shape
+
+    def update(self, delta_time, alpha: float = 1.0):
+        # Un cuerpo dormido no se mueve, el sprite ya está en su lugar
+        if self.body.is_sleeping:
+            return
+        self.center_x, self.center_y, self.radians = self.entity.interpolated(alpha)
 
-class Bird(arcade.Sprite):
-    def __init__(
-        self,
-        image_path: str,
-        image_scale: float,
-        flying_sound: str,
-        x: float,
-        y: float,
-        space: pymunk.Space,
-        mass: float = 5,
-        radius: float = 12,
-        max_impulse: float = 180,
-        elasticity: float = 0.8,
-        friction: float = 1,
-        collision_layer: int = 0,
-    ):
-        super().__init__(image_path, image_scale)
-        self.birds = arcade.SpriteList()
-        self.center_x = x
-        self.center_y = y
+class Bird(EntitySprite):
+    flying_sound = ""
 
-        self.flying_sound = arcade.load_sound(flying_sound)        
-        
-        self.space = space
-        self.mass = mass
-        self.radius = radius
-        self.elasticity = elasticity
-        self.friction = friction
-        self.collision_layer = collision_layer
-        self.max_impulse = max_impulse
-        self.power_multiplier = 35
-        
-        self.body = None
-        self.shape = None
-        self.in_physics_space = False
-        self.has_used_power = False
-        self.impulse_vector: ImpulseVector
-
-    def add_to_physics_space(self):
-        if self.in_physics_space:
-            return
-            
-        moment = pymunk.moment_for_circle(self.mass, 0, self.radius)
-        body = pymunk.Body(self.mass, moment)
-        body.position = (self.center_x, self.center_y)
-
-        shape = pymunk.Circle(body, self.radius)
-        shape.elasticity = self.elasticity
-        shape.friction = self.friction
-        shape.collision_type = self.collision_layer
-
-        self.space.add(body, shape)
-
-        self.body = body
-        self.shape = shape
-        self.in_physics_space = True
-
-    def launch(self, impulse_vector: ImpulseVector):
-        if not self.in_physics_space:
-            self.add_to_physics_space()
-        
-        if self.body is not None:
-            impulse = min(self.max_impulse, impulse_vector.impulse) * self.power_multiplier
-            impulse_pymunk = impulse * pymunk.Vec2d(1, 0)
-            self.body.apply_impulse_at_local_point(impulse_pymunk.rotated(impulse_vector.angle))
-
-    def update(self, delta_time):
-        if self.in_physics_space and self.shape is not None:
-            self.center_x = self.shape.body.position.x
-            self.center_y = self.shape.body.position.y
-            self.radians = self.shape.body.angle
+    def __init__(self, image_path: str, image_scale: float, entity: Entity):
+        super().__init__(get_texture(image_path), image_scale, entity)
+
+    def update(self, delta_time, alpha: float = 1.0):
+        if self.entity.in_space and not self.body.is_sleeping:
+            self.center_x, self.center_y, self.radians = self.entity.interpolated(alpha)
 
+    # Solo mueve pájaros que esperan fuera del espacio: mover el cuerpo de uno lanzado cambiaría
+    # la simulación sin que quede grabado en el replay
     def set_position(self, x, y):
+        if self.entity.in_space:
+            return
         self.center_x = x
         self.center_y = y
-        if self.in_physics_space and self.body:
-            self.body.position = (x, y)
-
-    def power_up(self):
-        pass
+        self.body.position = (x, y)
 
 class RedBird(Bird):
-    def __init__(self, x: float, y: float, space: pymunk.Space):
-        super().__init__("assets/img/red-bird.png", 1, "assets/msc/red-bird-flying.mp3", x, y, space, 4.5)
+    flying_sound = "assets/msc/red-bird-flying.mp3"
 
-    def power_up(self):
-        pass
+    def __init__(self, entity: Entity):
+        super().__init__("assets/img/red-bird.png", 1, entity)
 
 class BlueBird(Bird):
-    def __init__(self, x: float, y: float, space: pymunk.Space):
-        super().__init__("assets/img/blue-bird.png", 0.1, "assets/msc/blue-bird-flying.mp3", x, y, space, 4.5)
-        
-    def power_up(self):
-        if not self.has_used_power and self.impulse_vector:
-            positions = [15, -15]
-            
-            for position in positions:
-                clone = BlueBird(self.center_x, self.center_y + position, self.space)
-                clone.add_to_physics_space()
-                
-                angle_variation = 0.3 if position > 0 else -0.3
-                modified_impulse = ImpulseVector(
-                    self.impulse_vector.angle + angle_variation,
-                    self.impulse_vector.impulse * 0.8
-                )
-                clone.launch(modified_impulse)
-                self.birds.append(clone)
-            
-            self.has_used_power = True
+    flying_sound = "assets/msc/blue-bird-flying.mp3"
+
+    def __init__(self, entity: Entity):
+        super().__init__("assets/img/blue-bird.png", 0.1, entity)
 
 class YellowBird(Bird):
-    def __init__(self, x: float, y: float, space: pymunk.Space):
-        super().__init__("assets/img/yellow-bird.png", 0.035, "assets/msc/yellow-bird-flying.mp3", x, y, space, 4.5)
+    flying_sound = "assets/msc/yellow-bird-flying.mp3"
 
-    def power_up(self):
-        if not self.has_used_power and self.in_physics_space and self.body:
-            boost = 1.4
-            current_velocity = self.body.velocity
-            self.body.velocity = (current_velocity.x * boost, current_velocity.y * boost)
-            self.has_used_power = True
+    def __init__(self, entity: Entity):
+        super().__init__("assets/img/yellow-bird.png", 0.035, entity)
 
-class Pig(arcade.Sprite):
-    def __init__(
-        self,
-        x: float,
-        y: float,
-        space: pymunk.Space,
-        mass: float = 2,
-        elasticity: float = 0.8,
-        friction: float = 0.4,
-        collision_layer: int = 0,
-    ):
-        super().__init__("assets/img/pig.png", 0.1)
-        moment = pymunk.moment_for_circle(mass, 0, self.width / 2 - 3)
-        body = pymunk.Body(mass, moment)
-        body.position = (x, y)
-        shape = pymunk.Circle(body, self.width / 2 - 3)
-        shape.elasticity = elasticity
-        shape.friction = friction
-        shape.collision_type = collision_layer
-        space.add(body, shape)
-        self.body = body
-        self.shape = shape
-
-        self.death_sound = arcade.load_sound("assets/msc/pig-death.mp3")
-
-    def update(self, delta_time):
-        self.center_x = self.shape.body.position.x
-        self.center_y = self.shape.body.position.y
-        self.radians = self.shape.body.angle
-
-
-class PassiveObject(arcade.Sprite):
-    def __init__(
-        self,
-        image_path: str,
-        x: float,
-        y: float,
-        space: pymunk.Space,
-        mass: float = 2,
-        elasticity: float = 0.8,
-        friction: float = 1,
-        collision_layer: int = 0,
-    ):
-        super().__init__(image_path, 1)
+BIRD_SPRITES = {
+    "red": RedBird,
+    "blue": BlueBird,
+    "yellow": YellowBird,
+}
+
+class Pig(EntitySprite):
+    death_sound = "assets/msc/pig-death.mp3"
 
-        moment = pymunk.moment_for_box(mass, (self.width, self.height))
-        body = pymunk.Body(mass, moment)
-        body.position = (x, y)
-        shape = pymunk.Poly.create_box(body, (self.width, self.height))
-        shape.elasticity = elasticity
-        shape.friction = friction
-        shape.collision_type = collision_layer
-        space.add(body, shape)
-        self.body = body
-        self.shape = shape
+    def __init__(self, entity: Entity):
+        super().__init__(get_texture("assets/img/pig.png"), 0.1, entity)
 
-    def update(self, delta_time):
-        self.center_x = self.shape.body.position.x
-        self.center_y = self.shape.body.position.y
-        self.radians = self.shape.body.angle
+
+class PassiveObject(EntitySprite):
+    def __init__(self, image_path: str, entity: Entity):
+        super().__init__(get_texture(image_path), 1, entity)
 
 
 class Column(PassiveObject):
-    def __init__(self, x, y, space):
-        super().__init__("assets/img/column.png", x, y, space)
+    def __init__(self, entity: Entity):
+        super().__init__("assets/img/column.png", entity)
 
 class Beam(PassiveObject):
-    def __init__(self, x, y, space):
-        super().__init__("assets/img/beam.png", x, y, space)
+    def __init__(self, entity: Entity):
+        super().__init__("assets/img/beam.png", entity)
+
+BLOCK_SPRITES = {
+    "column": Column,
+    "beam": Beam,
+}
 
 class StaticObject(arcade.Sprite):
     def __init__(
@@ -200,14 +101,9 @@ class StaticObject(arcade.Sprite):
             image_scale: float,
             x: float,
             y: float,
-            space: pymunk.Space,
-            mass: float = 2,
-            elasticity: float = 0.8,
-            friction: float = 1,
-            collision_layer: int = 0,
     ):
-        super().__init__(image_path, image_scale, x, y)
+        super().__init__(get_texture(image_path), image_scale, x, y)
 
 class Sling(StaticObject):
-    def __init__(self, image_scale, x, y, space: pymunk.Space):
-        super().__init__("assets/img/sling.png", image_scale, x, y, space)
\ No newline at end of file
+    def __init__(self, image_scale, x, y):
+        super().__init__("assets/img/sling.png", image_scale, x, y)
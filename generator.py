@@ -0,0 +1,159 @@
+import argparse
+import math
+import random
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
+from logging import getLogger
+
+from entities import BLOCK_SPECS, PIG_SPEC, EntityPool
+from game_logic import FLOOR_Y, HEIGHT, WIDTH
+from levels import BlockTemplate, LevelTemplate, save_level_pack
+from simulation import Simulation
+
+logger = getLogger(__name__)
+
+# Separación entre el centro de una bahía y la siguiente, como en el nivel 6
+BAY_SPACING = 100
+# Distancia entre las dos columnas de un pórtico, como en los niveles 3 y 5
+PORTAL_SPAN = 60
+# Las estructuras no pueden quedar encima de la resortera
+MIN_X = 250
+# Espacio libre para que las piezas no aparezcan encimadas
+GAP = 0.5
+# Cuánto puede moverse un bloque mientras la estructura se acomoda sin que cuente como derrumbe
+MAX_DRIFT = 4.0
+MAX_TILT = 0.15
+SETTLE_TIMEOUT = 8.0
+# Cada proceso reusa los bloques y cerdos de un candidato para el siguiente
+CANDIDATE_POOL = EntityPool()
+
+@dataclass(frozen=True)
+class GeneratorParams:
+    # Cantidad de bahías de izquierda a derecha y pisos máximos de cada una
+    width: int = 4
+    height: int = 2
+    # Peso de cada material al elegir cómo se arma cada piso: pórtico de columnas o losa de vigas
+    materials: tuple[tuple[str, float], ...] = (("column", 2.0), ("beam", 1.0))
+    pigs: int = 3
+
+# Pisos de una bahía: un pórtico son dos columnas con una viga encima, una losa es una viga sola
+def build_bay(rng: random.Random, params: GeneratorParams, x: float) -> tuple[list[BlockTemplate], list[tuple[float, float]]]:
+    column = BLOCK_SPECS["column"]
+    beam = BLOCK_SPECS["beam"]
+    names = [name for name, _ in params.materials]
+    weights = [weight for _, weight in params.materials]
+
+    blocks = []
+    pig_spots = []
+    base = FLOOR_Y
+    for _ in range(rng.randint(1, params.height)):
+        material = rng.choices(names, weights)[0]
+        if material == "column":
+            blocks.append(BlockTemplate(column, x - PORTAL_SPAN / 2, base + column.height / 2 + GAP))
+            blocks.append(BlockTemplate(column, x + PORTAL_SPAN / 2, base + column.height / 2 + GAP))
+            # Un cerdo entra justo entre las dos columnas
+            pig_spots.append((x, base + PIG_SPEC.radius + GAP))
+            base += column.height + GAP
+        blocks.append(BlockTemplate(beam, x, base + beam.height / 2 + GAP))
+        base += beam.height + GAP
+    pig_spots.append((x, base + PIG_SPEC.radius + GAP))
+    return blocks, pig_spots
+
+# Un nivel candidato, siempre el mismo para la misma semilla, o None si no entra en la pantalla
+def generate_candidate(params: GeneratorParams, seed: int, number: int = 0) -> LevelTemplate | None:
+    rng = random.Random(seed)
+    right = WIDTH - BAY_SPACING
+    if right - (params.width - 1) * BAY_SPACING - BAY_SPACING / 2 < MIN_X:
+        return None
+    blocks = []
+    pig_spots = []
+    for bay in range(params.width):
+        bay_blocks, bay_pigs = build_bay(rng, params, right - bay * BAY_SPACING)
+        blocks += bay_blocks
+        pig_spots += bay_pigs
+
+    top = max(block.y + block.spec.height / 2 for block in blocks)
+    if top > HEIGHT or len(pig_spots) < params.pigs:
+        return None
+    pigs = rng.sample(pig_spots, params.pigs)
+    return LevelTemplate(number, tuple(blocks), tuple(pigs))
+
+# Dejar que la estructura se acomode sin tiros y rechazarla si algo se cae o muere un cerdo
+def settle(simulation: Simulation, template: LevelTemplate, settle_timeout: float) -> bool:
+    # Durante la gracia inicial los cerdos no reciben daño, después cualquier muerte es un derrumbe
+    while simulation.spawning or not simulation.settled:
+        simulation.step()
+        if simulation.time >= settle_timeout:
+            return False
+    if len(simulation.pigs) != len(template.pigs) or len(simulation.blocks) != len(template.blocks):
+        return False
+    for block, entity in zip(template.blocks, simulation.blocks):
+        x, y = entity.body.position
+        if math.hypot(x - block.x, y - block.y) > MAX_DRIFT or abs(entity.body.angle) > MAX_TILT:
+            return False
+    return True
+
+# Probar el candidato en una simulación propia y devolver sus objetos al pool del proceso
+def is_stable(template: LevelTemplate, settle_timeout: float = SETTLE_TIMEOUT) -> bool:
+    simulation = Simulation(template.number, seed=0, bird_order=[], template=template, pool=CANDIDATE_POOL)
+    stable = settle(simulation, template, settle_timeout)
+    simulation.dispose()
+    return stable
+
+def _evaluate(args: tuple) -> LevelTemplate | None:
+    params, seed = args
+    template = generate_candidate(params, seed)
+    if template is None or not is_stable(template):
+        return None
+    return template
+
+# Generar niveles estables probando candidatos en paralelo, en tandas hasta tener los pedidos
+def generate_pack(
+    params: GeneratorParams,
+    count: int,
+    seed: int = 0,
+    max_workers: int | None = None,
+    batch_size: int = 64,
+    max_candidates: int = 10_000,
+) -> list[LevelTemplate]:
+    accepted = []
+    next_seed = seed
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        while len(accepted) < count and next_seed - seed < max_candidates:
+            jobs = [(params, candidate_seed) for candidate_seed in range(next_seed, next_seed + batch_size)]
+            next_seed += batch_size
+            # map conserva el orden, así el resultado no depende de qué proceso termina primero
+            for template in executor.map(_evaluate, jobs, chunksize=max(1, batch_size // 8)):
+                if template is not None and len(accepted) < count:
+                    accepted.append(replace(template, number=len(accepted) + 1))
+    logger.debug("Aceptados %d niveles de %d candidatos", len(accepted), next_seed - seed)
+    return accepted
+
+def parse_materials(values: list[str]) -> tuple[tuple[str, float], ...]:
+    materials = []
+    for value in values:
+        name, _, weight = value.partition("=")
+        if name not in BLOCK_SPECS:
+            raise ValueError(f"Material desconocido: {name}")
+        materials.append((name, float(weight or 1)))
+    return tuple(materials)
+
+def main():
+    parser = argparse.ArgumentParser(description="Generar niveles estables")
+    parser.add_argument("output", help="archivo JSON donde guardar los niveles")
+    parser.add_argument("--count", type=int, default=20)
+    parser.add_argument("--width", type=int, default=GeneratorParams.width, help="cantidad de bahías")
+    parser.add_argument("--height", type=int, default=GeneratorParams.height, help="pisos máximos por bahía")
+    parser.add_argument("--pigs", type=int, default=GeneratorParams.pigs)
+    parser.add_argument("--materials", nargs="+", default=["column=2", "beam=1"], help="pesos como column=2 beam=1")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    params = GeneratorParams(args.width, args.height, parse_materials(args.materials), args.pigs)
+    templates = generate_pack(params, args.count, args.seed, args.workers)
+    save_level_pack(templates, args.output)
+    print(f"{len(templates)} niveles guardados en {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import json
+from dataclasses import dataclass
+from functools import lru_cache
+from logging import getLogger
+from types import MappingProxyType
+from typing import Mapping
+
+from entities import BLOCK_SPECS, BlockSpec
+
+logger = getLogger(__name__)
+
+DEFAULT_LEVEL_PACK = "assets/levels/levels.json"
+
+@dataclass(frozen=True)
+class BlockTemplate:
+    spec: BlockSpec
+    x: float
+    y: float
+
+# Nivel ya validado y listo para crear sus cuerpos en un espacio nuevo
+@dataclass(frozen=True)
+class LevelTemplate:
+    number: int
+    blocks: tuple[BlockTemplate, ...] = ()
+    pigs: tuple[tuple[float, float], ...] = ()
+
+def compile_level(data: dict) -> LevelTemplate:
+    blocks = []
+    for block in data.get("blocks", []):
+        if block["type"] not in BLOCK_SPECS:
+            raise ValueError(f"Tipo de bloque desconocido en el nivel {data['number']}: {block['type']}")
+        blocks.append(BlockTemplate(BLOCK_SPECS[block["type"]], float(block["x"]), float(block["y"])))
+    pigs = [(float(pig["x"]), float(pig["y"])) for pig in data.get("pigs", [])]
+    return LevelTemplate(int(data["number"]), tuple(blocks), tuple(pigs))
+
+# Inverso de compile_level, para guardar niveles generados con el mismo formato
+def level_to_dict(template: LevelTemplate) -> dict:
+    return {
+        "number": template.number,
+        "blocks": [{"type": block.spec.name, "x": block.x, "y": block.y} for block in template.blocks],
+        "pigs": [{"x": x, "y": y} for x, y in template.pigs],
+    }
+
+def save_level_pack(templates: list[LevelTemplate], path: str):
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump({"levels": [level_to_dict(template) for template in templates]}, file, indent=2)
+    # Si el archivo ya estaba cargado, la próxima lectura tiene que ver los niveles nuevos
+    load_level_pack.cache_clear()
+    logger.debug("Guardados %d niveles en %s", len(templates), path)
+
+# Leer y compilar un archivo de niveles una sola vez
+@lru_cache(maxsize=None)
+def load_level_pack(path: str = DEFAULT_LEVEL_PACK) -> Mapping[int, LevelTemplate]:
+    with open(path, encoding="utf-8") as file:
+        data = json.load(file)
+    templates = {}
+    for level in data["levels"]:
+        template = compile_level(level)
+        templates[template.number] = template
+    logger.debug("Cargados %d niveles de %s", len(templates), path)
+    return MappingProxyType(templates)
+
+def get_level_template(number: int, path: str = DEFAULT_LEVEL_PACK) -> LevelTemplate:
+    return load_level_pack(path)[number]
+
+def has_level(number: int, path: str = DEFAULT_LEVEL_PACK) -> bool:
+    return number in load_level_pack(path)
+
+def level_numbers(path: str = DEFAULT_LEVEL_PACK) -> list[int]:
+    return sorted(load_level_pack(path))
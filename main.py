@@ -1,11 +1,26 @@
+import argparse
+import bisect
 import math
 import logging
-import random
+import os
+import time
+from functools import lru_cache
 import arcade
-import pymunk
 
-from game_object import Beam, Bird, RedBird, BlueBird, YellowBird, Column, Pig, Sling
-from game_logic import get_impulse_vector, Point2D, get_distance
+from assets import Preload, get_texture, preload_async
+from game_object import BIRD_SPRITES, BLOCK_SPRITES, Bird, BlueBird, Pig, Sling
+from game_logic import WIDTH, HEIGHT, MAX_DRAG_DISTANCE, SLING_POS, SLING_ANCHOR, ImpulseVector, get_impulse_vector, Point2D, get_distance
+from entities import Entity
+from levels import has_level, level_numbers
+from music import GAME_MUSIC, MAIN_THEME, MUSIC, MUSIC_TRACKS
+from sfx import ERROR, LEVEL_COMPLETED, SFX, SLING_STRETCH
+from profiler import Profiler
+from replay import Replay, ReplayPlayer, ReplayRecorder
+from simulation import SLING_REST, Simulation, WorldSnapshot
+from solver import Hint, hint
+from sprite_sync import BodySpriteSync, TrackedSpriteList
+from trajectory import trajectory_preview
+from ui import ButtonLayer
 
 logging.basicConfig(level=logging.DEBUG)
 logging.getLogger("arcade").setLevel(logging.WARNING)
@@ -14,94 +29,141 @@ logging.getLogger("PIL").setLevel(logging.WARNING)
 
 logger = logging.getLogger("main")
 
-WIDTH = 1000
-HEIGHT = 500
 TITLE = "Angry Birds Demo"
-GRAVITY = -500
-MAX_DRAG_DISTANCE = 100
-SLING_POS = Point2D(160, 30)
-
-def check_button_resize(button: arcade.Sprite, x: float, y: float, base_scale: float, hover_scale: float):
-    if button.collides_with_point((x, y)):
-        button.scale = hover_scale
-    else:
-        button.scale = base_scale
+# Carpeta donde se guardan los replays de cada partida terminada (None para no grabar)
+RECORD_DIR: str | None = None
+# Un solo perfilador para todo el juego, se conecta al nivel que se está jugando
+PROFILER = Profiler()
+SHOW_PROFILER = False
+# El selector de niveles muestra una página a la vez, con filas de LEVELS_PER_ROW botones
+LEVELS_PER_ROW = 6
+LEVEL_ROWS = 3
+LEVELS_PER_PAGE = LEVELS_PER_ROW * LEVEL_ROWS
+LEVEL_ROW_SPACING = 120
 
 # Clase del Juego (App)
 class App(arcade.View):
-    def __init__(self, game_level: int):
+    def __init__(self, game_level: int, seed: int | None = None):
         super().__init__()
-        self.flying_bird:Bird
-        self.bird_on_sling: Bird
-        self.background = arcade.load_texture("assets/img/background.png")
-        self.space = pymunk.Space()
-        self.space.gravity = (0, GRAVITY)
-
-        # Piso
-        floor_body = pymunk.Body(body_type=pymunk.Body.STATIC)
-        floor_shape = pymunk.Segment(floor_body, [0, 10], [WIDTH, 10], 0.0) #type: ignore
-        floor_shape.friction = 100
-        self.space.add(floor_body, floor_shape)
+        self.flying_bird: Bird | None = None
+        # None cuando ya se lanzaron todos los pájaros
+        self.bird_on_sling: Bird | None = None
+        self.background = get_texture("assets/img/background.png")
+
+        # La física y las reglas del nivel viven en la simulación
+        self.simulation = Simulation(game_level, seed=seed)
+        self.simulation.on_remove = self.on_entities_removed
+        self.recorder = ReplayRecorder(self.simulation)
 
         self.game_level = game_level
         self.draw_sling_bird = True
 
         # Manejo de los pájaros
         self.birds = arcade.SpriteList()
-        self.pigs = arcade.SpriteList()
-        self.world = arcade.SpriteList()
+        self.pigs = TrackedSpriteList()
+        self.world = TrackedSpriteList()
+        self.entity_sprites: dict[Entity, arcade.Sprite] = {}
 
         self.generate_world()
+        # Los sprites de los cuerpos simulados se mueven todos juntos desde la física
+        self.sprite_sync = BodySpriteSync(self.simulation, [self.pigs, self.world])
 
-        self.sling = Sling(0.65, SLING_POS.x, SLING_POS.y, self.space)
+        self.sling = Sling(0.65, SLING_POS.x, SLING_POS.y)
         self.world.append(self.sling)
 
         self.start_point = Point2D()
         self.end_point = Point2D()
         self.distance = 0
         self.draw_line = False
+        # Puntos de la trayectoria del pájaro mientras se arrastra
+        self.trajectory: tuple[tuple[float, float], ...] = ()
+        # Mejor tiro encontrado por el solver para el pájaro en la resortera y su trayectoria
+        self.hint: Hint | None = None
+        self.hint_trajectory: tuple[tuple[float, float], ...] = ()
         self.ended = False
 
         self.level_failed = False
         self.level_won = False
-        self.waiting_for_result = False
-        self.result_timer = 0.0
-
 
         # Cooldown de 1 segundo para evitar clicks fantasma
         self.cooldown = 0.5
         self.time_since_start = 0.0
 
-        # Handler de colisiones
-        self.handler = self.space.add_default_collision_handler()
-        self.handler.post_solve = self.collision_handler
-
         # Botones despues de jugar
-        self.replay_button = arcade.Sprite("assets/img/replay-button.png", scale=0.15)
+        self.replay_button = arcade.Sprite(get_texture("assets/img/replay-button.png"), scale=0.15)
         self.replay_button.center_x = WIDTH // 2 - 150
         self.replay_button.center_y = HEIGHT // 2
 
-        self.menu_button = arcade.Sprite("assets/img/menu-button.png", scale=0.15)
+        self.menu_button = arcade.Sprite(get_texture("assets/img/menu-button.png"), scale=0.15)
         self.menu_button.center_x = WIDTH // 2 + 150
         self.menu_button.center_y = HEIGHT // 2
 
-        self.next_level_button = arcade.Sprite("assets/img/next-level-button.png", scale=0.15)
+        self.next_level_button = arcade.Sprite(get_texture("assets/img/next-level-button.png"), scale=0.15)
         self.next_level_button.center_x = WIDTH // 2
         self.next_level_button.center_y = HEIGHT // 2
 
+        self.end_buttons = ButtonLayer()
+        self.end_buttons.add(self.replay_button, 0.15, 0.20)
+        self.end_buttons.add(self.menu_button, 0.15, 0.20)
+        self.end_buttons.add(self.next_level_button, 0.15, 0.20)
         self.show_end_buttons = False
+        self.profiler_overlay: ProfilerOverlay | None = None
+
+        # Estados guardados para reiniciar el nivel o deshacer tiros sin reconstruir nada
+        self.initial_snapshot = self.simulation.snapshot()
+        self.shot_snapshots: list[WorldSnapshot] = []
+
+    # Quitar los sprites de los objetos que salieron de la simulación
+    def on_entities_removed(self, entities: list[Entity]):
+        death_sound = None
+        for entity in entities:
+            sprite = self.entity_sprites.get(entity)
+            if sprite is None:
+                continue
+            if entity.kind == "pig":
+                death_sound = sprite.death_sound
+            sprite.remove_from_sprite_lists()
+        # Un solo sonido aunque mueran varios cerdos en el mismo paso
+        if death_sound is not None:
+            SFX.play(death_sound)
+
+    # Volver a un estado guardado reutilizando los sprites existentes.
+    # Los sprites de objetos que volvieron al pool se conservan para cuando el pool los reuse.
+    def restore(self, snapshot: WorldSnapshot):
+        self.simulation.restore(snapshot)
+
+        self.pigs.clear()
+        self.birds.clear()
+        self.world.clear()
+        for entity in self.simulation.blocks:
+            self.world.append(self.entity_sprites[entity])
+        self.world.append(self.sling)
+        for entity in self.simulation.flying:
+            self.world.append(self.entity_sprites[entity])
+        for entity in self.simulation.pigs:
+            self.pigs.append(self.entity_sprites[entity])
+        for entity in self.simulation.birds:
+            bird = self.entity_sprites[entity]
+            bird.set_position(entity.body.position.x, entity.body.position.y)
+            self.birds.append(bird)
+        for sprite in self.entity_sprites.values():
+            sprite.update(0)
+
+        self.bird_on_sling = self.birds[0] if self.birds else None
+        self.draw_sling_bird = True
+        if self.simulation.flying_bird is not None:
+            self.flying_bird = self.entity_sprites[self.simulation.flying_bird]
+        else:
+            self.flying_bird = None
 
-    def collision_handler(self, arbiter, space, data):
-        impulse_norm = arbiter.total_impulse.length
-        if impulse_norm < 100:
-            return True
-        if impulse_norm > 1000:
-            for pig in self.pigs:
-                if pig.shape in arbiter.shapes:
-                    arcade.play_sound(pig.death_sound)
-                    self.pigs.remove(pig)
-                    self.space.remove(pig.shape, pig.body)
-        return True
+        self.draw_line = False
+        self.trajectory = ()
+        self.clear_hint()
+        self.ended = False
+        self.level_failed = False
+        self.level_won = False
+        self.show_end_buttons = False
+        self.time_since_start = 0.0
 
     # Generar los componentes que se van a mostrar
     def generate_world(self):
@@ -109,114 +171,78 @@ class App(arcade.View):
         self.add_pigs()
         self.add_birds()
 
-    # Añadir pájaros
+    # Añadir pájaros en el orden aleatorio de la simulación
     def add_birds(self):
-        initial_data = (50, 50, self.space)
-        red_bird = RedBird(*initial_data)
-        blue_bird = BlueBird(*initial_data)
-        yellow_bird = YellowBird(*initial_data)
-        birds = [red_bird, blue_bird, yellow_bird]
-        # Poner los pájaros de forma aleatoria
-        random.shuffle(birds)
-
-        for bird in birds: self.birds.append(bird)
-            
+        for entity in self.simulation.birds:
+            bird = BIRD_SPRITES[entity.spec.name](entity)
+            self.entity_sprites[entity] = bird
+            self.birds.append(bird)
+        # Los sprites de los clones también se crean acá y no al usar el power-up
+        for entity in self.simulation.reserved:
+            if entity not in self.entity_sprites:
+                self.entity_sprites[entity] = BIRD_SPRITES[entity.spec.name](entity)
+
         self.draw_sling_bird = True
         self.bird_on_sling = self.birds[0]
 
     # Añadir estructuras
     def add_columns(self):
-        if self.game_level == 1:
-            column = Column(WIDTH - 100, 50, self.space)
-            self.world.append(column)
-        elif self.game_level == 2:
-            column1 = Column(WIDTH - 100, 50, self.space)
-            column2 = Column(WIDTH - 200, 50, self.space)
-            self.world.append(column1)
-            self.world.append(column2)
-        elif self.game_level == 3:
-            column1 = Column(WIDTH - 120, 50, self.space)
-            column2 = Column(WIDTH - 180, 50, self.space)
-            beam = Beam(WIDTH - 150, 100, self.space)
-            self.world.append(column1)
-            self.world.append(column2)
-            self.world.append(beam)
-        elif self.game_level == 4:
-            beam1 = Beam(WIDTH - 150, 50, self.space)
-            beam2 = Beam(WIDTH - 300, 50, self.space)
-            beam3 = Beam(WIDTH - 175, 75, self.space)
-            beam4 = Beam(WIDTH - 275, 75, self.space)
-            beam5 = Beam(WIDTH - 225, 100, self.space)
-            self.world.append(beam1)
-            self.world.append(beam2)
-            self.world.append(beam3)
-            self.world.append(beam4)
-            self.world.append(beam5)
-        elif self.game_level == 5:
-            for i in range(2):
-                column1 = Column(WIDTH - 120, 50 + 100*i, self.space)
-                column2 = Column(WIDTH - 180, 50 + 100*i, self.space)
-                beam = Beam(WIDTH - 150, 100 + 100*i, self.space)
-                self.world.append(column1)
-                self.world.append(column2)
-                self.world.append(beam)
-        elif self.game_level == 6:
-            spacing = max(100, 300 - self.game_level * 40)
-            for x in range(WIDTH // 2, WIDTH, spacing):
-                column = Column(x, 50, self.space)
-                beam = Beam(x, 100, self.space)
-                self.world.append(column)
-                self.world.append(beam)
+        for entity in self.simulation.blocks:
+            block = BLOCK_SPRITES[entity.spec.name](entity)
+            self.entity_sprites[entity] = block
+            self.world.append(block)
 
     # Añadir cerdos
     def add_pigs(self):
-        if self.game_level == 1:
-            pig1 = Pig(WIDTH - 200, 20, self.space)
-            pig2 = Pig(WIDTH - 100, 90, self.space)
-            self.pigs.append(pig1)
-            self.pigs.append(pig2)
-        elif self.game_level == 2:
-            pig1 = Pig(WIDTH - 300, 20, self.space)
-            pig2 = Pig(WIDTH - 200, 90, self.space)
-            pig3 = Pig(WIDTH - 100, 90, self.space)
-            self.pigs.append(pig1)
-            self.pigs.append(pig2)
-            self.pigs.append(pig3)
-        elif self.game_level == 3:
-            pig1 = Pig(WIDTH - 150, 120, self.space)
-            pig2 = Pig(WIDTH - 150, 20, self.space)
-            self.pigs.append(pig1)
-            self.pigs.append(pig2)
-        elif self.game_level == 4:
-            pig1 = Pig(WIDTH - 225, 20, self.space)
-            pig2 = Pig(WIDTH - 225, 120, self.space)
-            self.pigs.append(pig1)
-            self.pigs.append(pig2)
-        elif self.game_level == 5:
-            pig1 = Pig(WIDTH - 150, 20, self.space)
-            pig2 = Pig(WIDTH - 150, 120, self.space)
-            pig3 = Pig(WIDTH - 150, 220, self.space)
-            self.pigs.append(pig1)
-            self.pigs.append(pig2)
-            self.pigs.append(pig3)
-        elif self.game_level == 6:
-            spacing = max(100, 300 - self.game_level * 40)
-            for x in range(WIDTH // 2, WIDTH, spacing):
-                pig = Pig(x, 120, self.space)
-                self.pigs.append(pig)
+        for entity in self.simulation.pigs:
+            pig = Pig(entity)
+            self.entity_sprites[entity] = pig
+            self.pigs.append(pig)
 
     def update_collisions(self):
         pass
 
-    # Reproducir la música del nivel al entrar al view
+    # Pasar a la música del nivel al entrar al view, si ya sonaba sigue sin cortarse
     def on_show_view(self):
-        self.game_music = arcade.load_sound("assets/msc/game-music.mp3")
-        self.game_music_player = arcade.play_sound(self.game_music, loop=True, volume=0.5)
+        MUSIC.play(GAME_MUSIC)
+        if SHOW_PROFILER:
+            self.attach_profiler()
 
-    # Detener la música
     def on_hide_view(self):
-        if self.game_music_player:
-            arcade.stop_sound(self.game_music_player)
+        self.detach_profiler()
+
+    # Medir cada fase del frame, solo mientras el perfilador está visible
+    def attach_profiler(self):
+        if PROFILER.active:
+            return
+        PROFILER.reset()
+        PROFILER.start_trace()
+        PROFILER.instrument(self.simulation, "advance", frame=True)
+        PROFILER.attach_simulation(self.simulation)
+        PROFILER.instrument(self, "sync_sprites")
+        PROFILER.instrument(self, "check_end")
+        PROFILER.instrument(self, "draw_scene")
+        self.profiler_overlay = ProfilerOverlay(PROFILER, self.simulation)
+
+    def detach_profiler(self):
+        if self.profiler_overlay is None:
+            return
+        PROFILER.detach()
+        PROFILER.stop_trace()
+        self.profiler_overlay = None
+
+    def toggle_profiler(self):
+        global SHOW_PROFILER
+        SHOW_PROFILER = self.profiler_overlay is None
+        if SHOW_PROFILER:
+            self.attach_profiler()
+        else:
+            self.detach_profiler()
+
+    def save_trace(self):
+        if self.profiler_overlay is None:
+            return
+        PROFILER.save_trace(f"trace-{time.strftime('%Y%m%d-%H%M%S')}.json")
 
     # Dibujar la cuerda para cuando se haga click
     def on_mouse_press(self, x, y, button, modifiers):
@@ -224,22 +250,23 @@ class App(arcade.View):
         if self.time_since_start < self.cooldown:
             return
         if button == arcade.MOUSE_BUTTON_LEFT and self.birds:
-            self.start_point = Point2D(SLING_POS.x - 10, SLING_POS.y + 45)
+            self.start_point = SLING_ANCHOR
             self.end_point = Point2D(x, y)
             self.draw_line = True
 
             if not self.ended:
-                self.sling_strech = arcade.load_sound("assets/msc/slingshot-streched.mp3")
-                arcade.play_sound(self.sling_strech)
+                SFX.play(SLING_STRETCH)
 
         if self.show_end_buttons:
-            if self.replay_button.collides_with_point((x, y)):
+            clicked = self.end_buttons.button_at(x, y)
+            if clicked is self.replay_button:
                 # Reiniciar nivel actual
-                game_view = App(self.game_level)
-                self.window.show_view(game_view)
+                self.restore(self.initial_snapshot)
+                self.shot_snapshots.clear()
+                self.recorder = ReplayRecorder(self.simulation)
                 return
 
-            if self.menu_button.collides_with_point((x, y)):
+            if clicked is self.menu_button:
                 from __main__ import LevelSelectView
                 next_level = self.game_level
                 if self.level_won:
@@ -248,9 +275,9 @@ class App(arcade.View):
                 self.window.show_view(level_select)
                 return
             
-            if self.next_level_button.collides_with_point((x, y)):
+            if clicked is self.next_level_button:
                 # Jugar el siguiente nivel
-                if self.level_won:
+                if self.level_won and has_level(self.game_level + 1):
                     game_view = App(self.game_level + 1)
                     self.window.show_view(game_view)
                     return
@@ -272,6 +299,7 @@ class App(arcade.View):
 
             if self.birds and self.bird_on_sling:
                 self.bird_on_sling.set_position(self.end_point.x, self.end_point.y)
+                self.trajectory = trajectory_preview(self.bird_on_sling.entity.spec, self.end_point)
 
     def on_mouse_release(self, x: int, y: int, button: int, modifiers: int):
         # Lanzar el pájaro hacia la dirección del mouse y actualizar la lista de pájaros
@@ -279,39 +307,83 @@ class App(arcade.View):
             return
         if button == arcade.MOUSE_BUTTON_LEFT and self.birds:
             self.draw_line = False
+            self.trajectory = ()
             impulse_vector = get_impulse_vector(self.end_point, self.start_point)
-            if self.birds and self.bird_on_sling:
-                self.bird_on_sling.impulse_vector = impulse_vector
-                self.bird_on_sling.launch(impulse_vector)
-            self.world.append(self.bird_on_sling)
-            arcade.play_sound(self.bird_on_sling.flying_sound, volume=0.7)
-            self.flying_bird = self.bird_on_sling
-            self.birds.pop(0)
-            if self.birds:
-                self.bird_on_sling = self.birds[0]
-            self.draw_sling_bird = True
-
-            # Si ya no quedan pájaros, inicia el contador
-            if not self.birds:
-                self.waiting_for_result = True
-                self.result_timer = 0.0
+            self.launch_bird(impulse_vector, (self.bird_on_sling.center_x, self.bird_on_sling.center_y))
+
+    # Lanzar el pájaro del tirachinas y actualizar la lista de pájaros
+    def launch_bird(self, impulse_vector: ImpulseVector, position: tuple[float, float]):
+        if self.recorder:
+            self.recorder.record_launch(impulse_vector, position)
+        self.shot_snapshots.append(self.simulation.snapshot())
+        self.bird_on_sling.set_position(*position)
+        self.clear_hint()
+        self.simulation.launch(impulse_vector, position)
+        self.world.append(self.bird_on_sling)
+        SFX.play(self.bird_on_sling.flying_sound)
+        self.flying_bird = self.bird_on_sling
+        self.birds.pop(0)
+        self.bird_on_sling = self.birds[0] if self.birds else None
+        self.draw_sling_bird = True
 
     def on_mouse_motion(self, x, y, dx, dy):
-        check_button_resize(self.replay_button, x, y, 0.15, 0.20)
-        check_button_resize(self.next_level_button, x, y, 0.15, 0.20)
-        check_button_resize(self.menu_button, x, y, 0.15, 0.20)
+        self.end_buttons.hover(x, y)
 
     def on_key_press(self, symbol, modifiers):
         if symbol == arcade.key.ESCAPE:
             self.window.show_view(LevelSelectView(self.game_level))
+        # Deshacer el último tiro
+        elif symbol == arcade.key.BACKSPACE and self.shot_snapshots:
+            self.undo_shot()
         ## Usar el power-up
         elif symbol == arcade.key.SPACE and self.flying_bird:
-            if not self.flying_bird.has_used_power:
-                self.flying_bird.power_up()
-                for bird in self.flying_bird.birds:
-                    self.world.append(bird)
+            self.use_power_up()
+        # Pedir una pista para el pájaro en la resortera
+        elif symbol == arcade.key.H and self.birds and not self.ended:
+            self.show_hint()
+        # Mostrar u ocultar el perfilador y guardar la traza
+        elif symbol == arcade.key.F3:
+            self.toggle_profiler()
+        elif symbol == arcade.key.F4:
+            self.save_trace()
+
+    def use_power_up(self):
+        if self.recorder:
+            self.recorder.record_power_up()
+        for entity in self.simulation.power_up():
+            # Un clon que sale del pool ya tiene su sprite, creado con el nivel o de la vez anterior
+            bird = self.entity_sprites.get(entity)
+            if bird is None:
+                bird = BlueBird(entity)
+                self.entity_sprites[entity] = bird
+            bird.update(0)
+            self.world.append(bird)
+
+    def show_hint(self):
+        self.hint = hint(self.simulation)
+        if self.hint is None:
+            self.hint_trajectory = ()
+            return
+        self.hint_trajectory = trajectory_preview(self.bird_on_sling.entity.spec, self.hint.drag_point)
+        logger.debug("Pista: soltar en (%.0f, %.0f), %d cerdos", self.hint.drag_point.x, self.hint.drag_point.y, self.hint.pigs_killed)
+
+    def clear_hint(self):
+        self.hint = None
+        self.hint_trajectory = ()
+
+    def undo_shot(self):
+        if not self.shot_snapshots:
+            return
+        if self.recorder:
+            self.recorder.record_undo()
+        self.restore(self.shot_snapshots.pop())
 
     def on_draw(self):
+        self.draw_scene()
+        if self.profiler_overlay:
+            self.profiler_overlay.draw()
+
+    def draw_scene(self):
         self.clear()
         arcade.draw_texture_rect(self.background, arcade.LRBT(0, WIDTH, 0, HEIGHT))
         self.pigs.draw()
@@ -320,117 +392,254 @@ class App(arcade.View):
         if self.bird_on_sling:
             arcade.draw_sprite(self.bird_on_sling)
             if self.draw_sling_bird:
-                self.bird_on_sling.set_position(SLING_POS.x - 25, SLING_POS.y + 18)
+                self.bird_on_sling.set_position(SLING_REST.x, SLING_REST.y)
                 self.draw_sling_bird = False
-        # Dibujar la cuerda
+        # Dibujar la pista: hasta dónde arrastrar y por dónde pasa el pájaro
+        if self.hint:
+            arcade.draw_points(self.hint_trajectory, arcade.color.YELLOW, 4)
+            arcade.draw_circle_outline(self.hint.drag_point.x, self.hint.drag_point.y, 14, arcade.color.YELLOW, 2)
+        # Dibujar la cuerda y hacia dónde va a salir el pájaro
         if self.draw_line:
+            if self.trajectory:
+                arcade.draw_points(self.trajectory, arcade.color.WHITE, 4)
             arcade.draw_line(SLING_POS.x - 10, SLING_POS.y + 45, self.end_point.x, self.end_point.y, arcade.color.DARK_BROWN, 3)
             arcade.draw_line(SLING_POS.x - 42, SLING_POS.y + 45, self.end_point.x, self.end_point.y, arcade.color.DARK_BROWN, 3)
         # Dibujar botones de reinicio o del menu
         if self.show_end_buttons:
             arcade.draw_sprite(self.replay_button)
             arcade.draw_sprite(self.menu_button)
-            if self.level_won:
+            if self.level_won and has_level(self.game_level + 1):
                 arcade.draw_sprite(self.next_level_button)
 
     def on_update(self, delta_time: float):
         self.time_since_start += delta_time
-        self.space.step(1 / 60.0)
+        # La física avanza en pasos fijos y los sprites se interpolan entre los dos últimos
+        alpha = self.simulation.advance(delta_time)
         self.update_collisions()
+        self.sync_sprites(delta_time, alpha)
+        self.check_end()
 
-        self.pigs.update(delta_time)
-        self.birds.update(delta_time)
-        self.world.update(delta_time)
-
-        # Remover sprites fuera de pantalla
-        for sprite in list(self.world) + list(self.pigs) + list(self.birds):
-            if sprite.center_x < 0 or sprite.center_x > WIDTH or sprite.center_y < 0 or sprite.center_y > HEIGHT:
-                try:
-                    self.space.remove(sprite.shape, sprite.body)
-                except Exception:
-                    pass
-                if sprite in self.world:
-                    self.world.remove(sprite)
-                if sprite in self.pigs:
-                    arcade.play_sound(sprite.death_sound)
-                    self.pigs.remove(sprite)
-                if sprite in self.birds:
-                    self.birds.remove(sprite)
+    def sync_sprites(self, delta_time: float, alpha: float):
+        self.birds.update(delta_time, alpha)
+        self.sprite_sync.sync(alpha)
 
+    def check_end(self):
         # Verificar si todos los cerdos muertos
-        if not self.pigs and not self.ended:
+        if self.simulation.won and not self.ended:
             self.ended = True
             self.level_won = True
             self.show_end_buttons = True
-            self.victory_music = arcade.load_sound("assets/msc/level-completed.mp3")
-            arcade.play_sound(self.victory_music, volume=0.5)
-
-        # Esperar despues de lanzar el último pájaro, si aún hay cerdos, se considera derrota
-        if self.waiting_for_result and not self.ended:
-            self.result_timer += delta_time
-            # Pasaron los 3 segundos de espera
-            if self.result_timer >= 3:
-                self.waiting_for_result = False
-                if self.pigs:
-                    self.ended = True
-                    self.level_failed = True
-                    self.show_end_buttons = True
+            SFX.play(LEVEL_COMPLETED)
+            self.save_replay()
+
+        # Pasaron los 3 segundos de espera despues del último pájaro y aún hay cerdos
+        if self.simulation.failed and not self.ended:
+            self.ended = True
+            self.level_failed = True
+            self.show_end_buttons = True
+            self.save_replay()
+
+    # Guardar la partida para poder repetirla sin ventana
+    def save_replay(self):
+        if RECORD_DIR is None or not self.recorder:
+            return
+        os.makedirs(RECORD_DIR, exist_ok=True)
+        path = os.path.join(RECORD_DIR, f"level-{self.game_level}-{time.strftime('%Y%m%d-%H%M%S')}-{self.simulation.steps}.json")
+        self.recorder.replay.save(path)
+        logger.info("Replay guardado en %s", path)
+
+# Tiempos del frame, cantidad de cuerpos y colisiones, dibujados encima del nivel
+class ProfilerOverlay:
+    # Refrescar el texto unas pocas veces por segundo para que se pueda leer
+    REFRESH = 0.25
+
+    def __init__(self, profiler: Profiler, simulation: Simulation):
+        self.profiler = profiler
+        self.simulation = simulation
+        self.text = arcade.Text("", 10, HEIGHT - 20, arcade.color.BLACK, 10, width=WIDTH // 2, multiline=True)
+        self.last_refresh = 0.0
+
+    def refresh(self):
+        frame = self.profiler.frame_percentiles()
+        space = self.simulation.space
+        lines = [
+            f"frame p50 {frame[50] * 1000:.1f} ms  p95 {frame[95] * 1000:.1f} ms  p99 {frame[99] * 1000:.1f} ms",
+            f"cuerpos {len(space.bodies)}  formas {len(space.shapes)}  colisiones/frame {self.profiler.counters.get('collisions', 0)}",
+        ]
+        for name, mean in sorted(self.profiler.zone_means().items(), key=lambda item: -item[1]):
+            lines.append(f"{name:<16} {mean * 1000:.2f} ms")
+        self.text.text = "\n".join(lines)
+
+    def draw(self):
+        now = time.perf_counter()
+        if now - self.last_refresh >= self.REFRESH:
+            self.refresh()
+            self.last_refresh = now
+        self.text.draw()
+
+# Reproduce un replay en tiempo real, sin aceptar acciones del jugador
+class ReplayApp(App):
+    def __init__(self, replay: Replay):
+        super().__init__(replay.game_level, replay.seed)
+        self.recorder = None
+        self.player = ReplayPlayer(replay, self)
+
+    def on_mouse_press(self, x, y, button, modifiers):
+        pass
+
+    def on_mouse_drag(self, x, y, dx, dy, buttons, modifiers):
+        pass
+
+    def on_mouse_release(self, x, y, button, modifiers):
+        pass
+
+    def on_key_press(self, symbol, modifiers):
+        if symbol == arcade.key.ESCAPE:
+            arcade.close_window()
+
+# Círculo del mismo tamaño que las imágenes de los niveles, para los que no tienen una propia
+@lru_cache(maxsize=None)
+def get_blank_level_texture() -> arcade.Texture:
+    return arcade.make_circle_texture(726, (250, 200, 10, 255), name="blank-level")
+
+# Textura del botón de un nivel y si ya trae el número dibujado
+def get_level_texture(number: int) -> tuple[arcade.Texture, bool]:
+    path = f"assets/img/level-{number}.png"
+    if os.path.exists(path):
+        return get_texture(path), True
+    return get_blank_level_texture(), False
 
 # Vista de Selector de Niveles
 class LevelSelectView(arcade.View):
     def __init__(self, next_level):
         super().__init__()
-        self.background = arcade.load_texture("assets/img/background.png")
+        self.background = get_texture("assets/img/background.png")
         self.level_buttons = arcade.SpriteList()
+        self.buttons = ButtonLayer()
+        self.labels: list[arcade.Text] = []
         self.next_level = next_level
+        self.levels = level_numbers()
+        self.pages = max(1, math.ceil(len(self.levels) / LEVELS_PER_PAGE))
+        self.page_label = arcade.Text("", WIDTH // 2, 30, arcade.color.WHITE, 16, anchor_x="center")
+        # Empezar en la página del próximo nivel a jugar
+        self.show_page(self.page_of(next_level))
+
+    def page_of(self, level_number: int) -> int:
+        if not self.levels:
+            return 0
+        index = min(bisect.bisect_left(self.levels, level_number), len(self.levels) - 1)
+        return index // LEVELS_PER_PAGE
+
+    # Solo existen los botones de la página visible, así el selector no crece con la cantidad de niveles
+    def show_page(self, page: int):
+        self.page = page
+        self.level_buttons.clear()
+        self.buttons.clear()
+        self.labels = []
+        levels = self.levels[page * LEVELS_PER_PAGE:(page + 1) * LEVELS_PER_PAGE]
 
         start_x = 100
-        start_y = 250
-        spacing_x = (WIDTH - 200) //5
+        spacing_x = (WIDTH - 200) // (LEVELS_PER_ROW - 1)
+        rows = math.ceil(len(levels) / LEVELS_PER_ROW)
+        # Las filas quedan centradas alrededor de la altura que tenía la fila única
+        start_y = 250 + (rows - 1) * LEVEL_ROW_SPACING / 2
         # Dibujar los botones para selccionar el nivel
-        for i in range(6):
-            button = arcade.Sprite(f"assets/img/level-{i+1}.png", scale=0.15)
-            button.center_x = start_x + i * spacing_x
-            button.center_y = start_y
-            setattr(button, "level_number", i + 1)
+        for i, level_number in enumerate(levels):
+            texture, numbered = get_level_texture(level_number)
+            button = arcade.Sprite(texture, scale=0.15)
+            button.center_x = start_x + (i % LEVELS_PER_ROW) * spacing_x
+            button.center_y = start_y - (i // LEVELS_PER_ROW) * LEVEL_ROW_SPACING
+            setattr(button, "level_number", level_number)
             self.level_buttons.append(button)
+            self.buttons.add(button, 0.15, 0.20)
+            if not numbered:
+                self.labels.append(arcade.Text(
+                    str(level_number), button.center_x, button.center_y, arcade.color.WHITE, 28,
+                    anchor_x="center", anchor_y="center", bold=True,
+                ))
+        self.page_label.text = f"< {page + 1} / {self.pages} >"
+
+    def change_page(self, step: int):
+        page = max(0, min(self.pages - 1, self.page + step))
+        if page != self.page:
+            self.show_page(page)
+
+    # Volver al tema principal, por ejemplo al salir de un nivel
+    def on_show_view(self):
+        MUSIC.play(MAIN_THEME)
 
     def on_draw(self):
         self.clear()
         arcade.draw_texture_rect(self.background, arcade.LRBT(0, WIDTH, 0, HEIGHT))
         self.level_buttons.draw()
+        for label in self.labels:
+            label.draw()
+        if self.pages > 1:
+            self.page_label.draw()
 
     # Al presionar sobre un boton te lleva a la pantalla del juego con el nivel seleccionado
     def on_mouse_press(self, x, y, button, modifiers):
         if button == arcade.MOUSE_BUTTON_LEFT:
-            for btn in self.level_buttons:
-                if btn.collides_with_point((x, y)):
-                    if btn.level_number <= self.next_level:
-                        game_view = App(btn.level_number)
-                        self.window.show_view(game_view)
-                    else:
-                        self.music = arcade.load_sound("assets/msc/error.mp3")
-                        self.music_player = arcade.play_sound(self.music, volume=0.6)
+            btn = self.buttons.button_at(x, y)
+            if btn is not None:
+                if btn.level_number <= self.next_level:
+                    game_view = App(btn.level_number)
+                    self.window.show_view(game_view)
+                else:
+                    SFX.play(ERROR)
 
     def on_mouse_motion(self, x, y, dx, dy):
-        for btn in self.level_buttons:
-            check_button_resize(btn, x, y, 0.15, 0.20)
+        self.buttons.hover(x, y)
 
+    # La rueda del mouse y las flechas cambian de página
+    def on_mouse_scroll(self, x, y, scroll_x, scroll_y):
+        if scroll_y:
+            self.change_page(-1 if scroll_y > 0 else 1)
+            self.buttons.hover(x, y)
 
     # Regresar a la Pantalla Inicial
     def on_key_press(self, symbol, modifiers):
         if symbol == arcade.key.ESCAPE:
             self.window.show_view(StartView())
+        elif symbol == arcade.key.LEFT:
+            self.change_page(-1)
+        elif symbol == arcade.key.RIGHT:
+            self.change_page(1)
+
+# Pantalla de carga: dibuja el avance mientras los recursos se cargan en otros hilos
+class LoadingView(arcade.View):
+    def __init__(self, preload: Preload, next_view):
+        super().__init__()
+        # El fondo se carga antes que el resto para poder mostrar algo
+        self.background = get_texture("assets/img/background.png")
+        self.preload = preload
+        self.next_view = next_view
+
+    def on_draw(self):
+        self.clear()
+        arcade.draw_texture_rect(self.background, arcade.LRBT(0, WIDTH, 0, HEIGHT))
+        left = WIDTH // 2 - 200
+        bottom = HEIGHT // 2 - 10
+        arcade.draw_lrbt_rectangle_filled(left, left + 400 * self.preload.progress, bottom, bottom + 20, arcade.color.WHITE)
+        arcade.draw_lrbt_rectangle_outline(left, left + 400, bottom, bottom + 20, arcade.color.BLACK, 2)
+
+    # La vista siguiente se crea recién cuando todo está cargado, así no se traba al construirla
+    def on_update(self, delta_time: float):
+        if self.preload.future.done():
+            self.preload.future.result()
+            self.window.show_view(self.next_view())
 
 # Vista de Inicio
 class StartView(arcade.View):
     def __init__(self):
         super().__init__()
-        self.background = arcade.load_texture("assets/img/background.png")
-        self.play_button = arcade.Sprite("assets/img/play-button.png", scale=0.3)
+        self.background = get_texture("assets/img/background.png")
+        self.play_button = arcade.Sprite(get_texture("assets/img/play-button.png"), scale=0.3)
         self.play_button.center_x = WIDTH // 2
         self.play_button.center_y = HEIGHT // 2 - 100
-        self.title = arcade.Sprite("assets/img/angry-birds-logo.png", scale=0.3)
+        self.buttons = ButtonLayer()
+        self.buttons.add(self.play_button, 0.3, 0.35)
+        self.title = arcade.Sprite(get_texture("assets/img/angry-birds-logo.png"), scale=0.3)
         self.title.center_x = WIDTH // 2
         self.title.center_y = HEIGHT // 2 + 100
 
@@ -440,25 +649,19 @@ class StartView(arcade.View):
         arcade.draw_sprite(self.title)
         arcade.draw_sprite(self.play_button)
 
-    # Reproducir la música inicial entrar al view
+    # Reproducir la música inicial al entrar al view, sigue sonando en el selector de niveles
     def on_show_view(self):
-        self.music = arcade.load_sound("assets/msc/main-theme.mp3")
-        self.music_player = arcade.play_sound(self.music, loop = True, volume=0.5)
-
-    # Detener la música
-    def on_hide_view(self):
-        if self.music_player:
-            arcade.stop_sound(self.music_player)
+        MUSIC.play(MAIN_THEME)
 
     # Al presionar el boton de inicio se cambia al view de los niveles
     def on_mouse_press(self, x, y, button, modifiers):
         if button == arcade.MOUSE_BUTTON_LEFT:
-            if self.play_button.collides_with_point((x, y)):
+            if self.buttons.button_at(x, y) is self.play_button:
                 level_view = LevelSelectView(1)
                 self.window.show_view(level_view)
 
     def on_mouse_motion(self, x, y, dx, dy):
-        check_button_resize(self.play_button, x, y, 0.3, 0.35)
+        self.buttons.hover(x, y)
 
     # Key-button para cerrar la pestaña
     def on_key_press(self, symbol, modifiers):
@@ -467,9 +670,23 @@ class StartView(arcade.View):
 
 # Main
 def main():
+    global RECORD_DIR, SHOW_PROFILER
+    parser = argparse.ArgumentParser(description=TITLE)
+    parser.add_argument("--record", metavar="DIR", help="guardar un replay de cada partida terminada en DIR")
+    parser.add_argument("--replay", metavar="FILE", help="ver un replay en tiempo real")
+    parser.add_argument("--profile", action="store_true", help="empezar con el perfilador visible (F3)")
+    args = parser.parse_args()
+    RECORD_DIR = args.record
+    SHOW_PROFILER = args.profile
+
     window = arcade.Window(WIDTH, HEIGHT, TITLE)
-    start = StartView()
-    window.show_view(start)
+    if args.replay:
+        replay = Replay.load(args.replay)
+        next_view = lambda: ReplayApp(replay)
+    else:
+        next_view = StartView
+    # La música no se precarga, se lee del disco mientras suena
+    window.show_view(LoadingView(preload_async(exclude=MUSIC_TRACKS), next_view))
     arcade.run()
 
 if __name__ == "__main__":
@@ -0,0 +1,103 @@
+from logging import getLogger
+
+import arcade
+from pyglet import media
+
+logger = getLogger(__name__)
+
+MUSIC_VOLUME = 0.5
+# Segundos que dura el cruce entre una pista y la siguiente
+CROSSFADE_TIME = 1.5
+FADE_INTERVAL = 1 / 30
+
+# Pistas largas que se leen del disco de a pedazos en lugar de decodificarse enteras en memoria
+MAIN_THEME = "assets/msc/main-theme.mp3"
+GAME_MUSIC = "assets/msc/game-music.mp3"
+MUSIC_TRACKS = (MAIN_THEME, GAME_MUSIC)
+
+# Una pista sonando en bucle. Una fuente en streaming solo se puede reproducir una vez,
+# así que siempre hay una copia más en la cola para que la vuelta no tenga cortes.
+class MusicTrack:
+    def __init__(self, path: str, volume: float):
+        self.path = path
+        self.player = media.Player()
+        self.player.volume = volume
+        self.player.queue(media.load(path, streaming=True))
+        self.player.queue(media.load(path, streaming=True))
+        self.player.push_handlers(on_eos=self.on_eos)
+        self.player.play()
+
+    @property
+    def volume(self) -> float:
+        return self.player.volume
+
+    @volume.setter
+    def volume(self, value: float):
+        self.player.volume = value
+
+    def on_eos(self):
+        self.player.queue(media.load(self.path, streaming=True))
+
+    def stop(self):
+        self.player.pause()
+        self.player.delete()
+
+# Música de fondo compartida por todas las vistas: si una vista pide la pista que ya suena,
+# sigue sonando sin cortes; si pide otra, las dos se cruzan durante CROSSFADE_TIME
+class MusicPlayer:
+    def __init__(self, volume: float = MUSIC_VOLUME, fade_time: float = CROSSFADE_TIME):
+        self.volume = volume
+        self.fade_time = fade_time
+        self.current: MusicTrack | None = None
+        # Pistas que se están apagando y el volumen que tenían al empezar a apagarse
+        self.outgoing: list[tuple[MusicTrack, float]] = []
+        self.fade_start = 0.0
+        self.fade_elapsed = 0.0
+        self.fading = False
+
+    @property
+    def track(self) -> str | None:
+        return self.current.path if self.current else None
+
+    def play(self, path: str):
+        if self.track == path:
+            return
+        self.fade_out_current()
+        self.current = MusicTrack(path, 0.0)
+        self.start_fade()
+        logger.debug("Música: %s", path)
+
+    def stop(self):
+        self.fade_out_current()
+        self.start_fade()
+
+    def fade_out_current(self):
+        if self.current is not None:
+            self.outgoing.append((self.current, self.current.volume))
+            self.current = None
+
+    def start_fade(self):
+        # Si ya había un cruce a medias, cada pista sigue desde el volumen que tiene ahora
+        self.outgoing = [(track, track.volume) for track, _ in self.outgoing]
+        self.fade_start = self.current.volume if self.current else 0.0
+        self.fade_elapsed = 0.0
+        if not self.fading:
+            arcade.schedule(self.update_fade, FADE_INTERVAL)
+            self.fading = True
+
+    def update_fade(self, delta_time: float):
+        self.fade_elapsed += delta_time
+        t = min(1.0, self.fade_elapsed / self.fade_time) if self.fade_time > 0 else 1.0
+        if self.current is not None:
+            self.current.volume = self.fade_start + (self.volume - self.fade_start) * t
+        for track, start in self.outgoing:
+            track.volume = start * (1 - t)
+        if t >= 1.0:
+            for track, _ in self.outgoing:
+                track.stop()
+            self.outgoing.clear()
+            arcade.unschedule(self.update_fade)
+            self.fading = False
+
+# Un solo reproductor de música para todo el juego
+MUSIC = MusicPlayer()
@@ -0,0 +1,149 @@
+import json
+import time
+from collections import deque
+from logging import getLogger
+
+logger = getLogger(__name__)
+
+# Cantidad de frames que se guardan para calcular percentiles
+FRAME_WINDOW = 240
+# Máximo de eventos guardados para exportar la traza, se descartan los más viejos
+TRACE_LIMIT = 200_000
+
+def percentile(values, p: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+# Mide zonas del código reemplazando métodos de objetos concretos por versiones cronometradas.
+# Mientras no está conectado no hay ningún envoltorio, así que apagado no cuesta nada.
+class Profiler:
+    def __init__(self, window: int | None = FRAME_WINDOW):
+        self.window = window
+        self.frame_times: deque[float] = deque(maxlen=window)
+        # Tiempo total de cada zona en cada uno de los últimos frames
+        self.zone_times: dict[str, deque[float]] = {}
+        # Contadores del último frame terminado
+        self.counters: dict[str, int] = {}
+
+        self.frame_start: float | None = None
+        self.frame_zones: dict[str, float] = {}
+        self.frame_counters: dict[str, int] = {}
+
+        self.trace: deque[dict] | None = None
+        self.trace_start = 0.0
+        # (objeto, atributo, valor anterior en la instancia o None si venía de la clase)
+        self.patches: list[tuple[object, str, object | None]] = []
+        self.simulations = []
+
+    @property
+    def active(self) -> bool:
+        return bool(self.patches)
+
+    # Cerrar el frame anterior y empezar uno nuevo
+    def next_frame(self):
+        now = time.perf_counter()
+        if self.frame_start is not None:
+            self.frame_times.append(now - self.frame_start)
+            for name, total in self.frame_zones.items():
+                if name not in self.zone_times:
+                    self.zone_times[name] = deque(maxlen=self.window)
+                self.zone_times[name].append(total)
+            self.counters = self.frame_counters
+        self.frame_start = now
+        self.frame_zones = {}
+        self.frame_counters = {}
+
+    # Versión cronometrada de una función, opcionalmente cuenta las llamadas o marca el inicio de un frame
+    def zone(self, name: str, function, counter: str | None = None, frame: bool = False):
+        perf_counter = time.perf_counter
+
+        def wrapper(*args, **kwargs):
+            if frame:
+                self.next_frame()
+            start = perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                end = perf_counter()
+                self.frame_zones[name] = self.frame_zones.get(name, 0.0) + end - start
+                if counter is not None:
+                    self.frame_counters[counter] = self.frame_counters.get(counter, 0) + 1
+                if self.trace is not None:
+                    self.trace.append({
+                        "name": name,
+                        "ph": "X",
+                        "ts": (start - self.trace_start) * 1e6,
+                        "dur": (end - start) * 1e6,
+                        "pid": 0,
+                        "tid": 0,
+                    })
+        return wrapper
+
+    def patch(self, obj, attribute: str, replacement):
+        self.patches.append((obj, attribute, vars(obj).get(attribute)))
+        setattr(obj, attribute, replacement)
+
+    def instrument(self, obj, attribute: str, name: str | None = None, counter: str | None = None, frame: bool = False):
+        function = getattr(obj, attribute)
+        self.patch(obj, attribute, self.zone(name or attribute, function, counter, frame))
+
+    # Zonas de cada fase del paso de física y de los callbacks de colisión
+    def attach_simulation(self, simulation):
+        for phase in ("prepare_bodies", "cull", "check_result"):
+            self.instrument(simulation, phase)
+        self.instrument(simulation, "pig_collision_handler", "collision", "collisions")
+        self.instrument(simulation, "pigs_collision_handler", "collision", "collisions")
+        simulation.space.step = self.zone("space.step", simulation.space.step)
+
+        # Restaurar un estado crea un espacio nuevo, que también se tiene que medir
+        create_space = simulation.create_space
+
+        def create_instrumented_space():
+            space = create_space()
+            space.step = self.zone("space.step", space.step)
+            return space
+        self.patch(simulation, "create_space", create_instrumented_space)
+        # Los handlers ya registrados apuntan a los métodos sin medir
+        simulation.register_collision_handlers(simulation.space)
+        self.simulations.append(simulation)
+
+    # Sacar todos los envoltorios y dejar los objetos como estaban
+    def detach(self):
+        for obj, attribute, previous in reversed(self.patches):
+            if previous is None:
+                delattr(obj, attribute)
+            else:
+                setattr(obj, attribute, previous)
+        self.patches.clear()
+        for simulation in self.simulations:
+            vars(simulation.space).pop("step", None)
+            simulation.register_collision_handlers(simulation.space)
+        self.simulations.clear()
+        self.frame_start = None
+
+    def reset(self):
+        self.frame_times.clear()
+        self.zone_times.clear()
+        self.counters = {}
+
+    def start_trace(self, limit: int = TRACE_LIMIT):
+        self.trace = deque(maxlen=limit)
+        self.trace_start = time.perf_counter()
+
+    def stop_trace(self):
+        self.trace = None
+
+    # Guardar la traza en el formato de eventos de Chrome (chrome://tracing o Perfetto)
+    def save_trace(self, path: str):
+        events = list(self.trace) if self.trace is not None else []
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
+        logger.info("Traza con %d eventos guardada en %s", len(events), path)
+
+    def frame_percentiles(self, ps: tuple[float, ...] = (50, 95, 99)) -> dict[float, float]:
+        return {p: percentile(self.frame_times, p) for p in ps}
+
+    def zone_means(self) -> dict[str, float]:
+        return {name: sum(times) / len(times) for name, times in self.zone_times.items() if times}
@@ -0,0 +1,118 @@
+import argparse
+import json
+from dataclasses import dataclass, field
+from logging import getLogger
+
+from game_logic import ImpulseVector
+from simulation import RESULT_TIMEOUT, Simulation, WorldSnapshot
+
+logger = getLogger(__name__)
+
+REPLAY_VERSION = 1
+
+# Cada evento guarda el número de paso de física en el que ocurrió:
+#   ["launch", paso, ángulo, impulso, x, y]
+#   ["power", paso]
+#   ["undo", paso]
+@dataclass
+class Replay:
+    game_level: int
+    seed: int
+    events: list[list] = field(default_factory=list)
+
+    def save(self, path: str):
+        data = {"version": REPLAY_VERSION, "level": self.game_level, "seed": self.seed, "events": self.events}
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(data, file, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, path: str) -> "Replay":
+        with open(path, encoding="utf-8") as file:
+            data = json.load(file)
+        if data.get("version") != REPLAY_VERSION:
+            raise ValueError(f"Versión de replay no soportada: {data.get('version')}")
+        return cls(data["level"], data["seed"], data["events"])
+
+class ReplayRecorder:
+    def __init__(self, simulation: Simulation):
+        self.simulation = simulation
+        self.replay = Replay(simulation.game_level, simulation.seed)
+
+    def record_launch(self, impulse_vector: ImpulseVector, position: tuple[float, float]):
+        self.replay.events.append(
+            ["launch", self.simulation.steps, impulse_vector.angle, impulse_vector.impulse, position[0], position[1]]
+        )
+
+    def record_power_up(self):
+        self.replay.events.append(["power", self.simulation.steps])
+
+    def record_undo(self):
+        self.replay.events.append(["undo", self.simulation.steps])
+
+# Juego sin ventana con las mismas acciones que App, para reproducir replays a máxima velocidad
+class HeadlessGame:
+    def __init__(self, simulation: Simulation):
+        self.simulation = simulation
+        self.shot_snapshots: list[WorldSnapshot] = []
+
+    def launch_bird(self, impulse_vector: ImpulseVector, position: tuple[float, float]):
+        self.shot_snapshots.append(self.simulation.snapshot())
+        self.simulation.launch(impulse_vector, position)
+
+    def use_power_up(self):
+        self.simulation.power_up()
+
+    def undo_shot(self):
+        if self.shot_snapshots:
+            self.simulation.restore(self.shot_snapshots.pop())
+
+# Aplica los eventos de un replay justo antes del paso de física en el que se grabaron
+class ReplayPlayer:
+    def __init__(self, replay: Replay, game):
+        self.replay = replay
+        self.game = game
+        self.index = 0
+        game.simulation.on_step = self.apply_due_events
+
+    @property
+    def finished(self) -> bool:
+        return self.index >= len(self.replay.events)
+
+    def apply_due_events(self):
+        simulation = self.game.simulation
+        while not self.finished and self.replay.events[self.index][1] <= simulation.steps:
+            event = self.replay.events[self.index]
+            if event[1] < simulation.steps:
+                raise ValueError(f"Evento fuera de orden en el paso {simulation.steps}: {event}")
+            self.index += 1
+            if event[0] == "launch":
+                self.game.launch_bird(ImpulseVector(event[2], event[3]), (event[4], event[5]))
+            elif event[0] == "power":
+                self.game.use_power_up()
+            elif event[0] == "undo":
+                self.game.undo_shot()
+            else:
+                raise ValueError(f"Evento desconocido: {event}")
+
+# Volver a simular un replay sin ventana
+def play(replay: Replay, max_time: float = RESULT_TIMEOUT) -> Simulation:
+    simulation = Simulation(replay.game_level, seed=replay.seed)
+    player = ReplayPlayer(replay, HeadlessGame(simulation))
+    # Igual que en App, la física sigue corriendo aunque el nivel haya terminado
+    while not player.finished:
+        simulation.step()
+    # Después del último evento se espera como máximo max_time a que el nivel termine
+    simulation.run(simulation.time + max_time)
+    return simulation
+
+def main():
+    parser = argparse.ArgumentParser(description="Reproducir replays sin ventana")
+    parser.add_argument("replays", nargs="+", help="archivos de replay")
+    args = parser.parse_args()
+    for path in args.replays:
+        simulation = play(Replay.load(path))
+        result = "ganado" if simulation.won else "perdido" if simulation.failed else "sin terminar"
+        print(f"{path}: nivel {simulation.game_level} {result}, {len(simulation.pigs)} cerdos, {simulation.time:.2f} s")
+
+if __name__ == "__main__":
+    main()
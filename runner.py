@@ -0,0 +1,203 @@
+import argparse
+import random
+import statistics
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from logging import getLogger
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from entities import BIRD_SPECS, EntityPool
+from game_logic import ImpulseVector, max_impulse
+from levels import level_numbers
+from simulation import RESULT_TIMEOUT, Simulation
+
+logger = getLogger(__name__)
+
+# Rango de los tiros al azar: ángulo en radianes, impulso mínimo como en get_impulse_vector
+# (el máximo depende del ángulo, ver max_impulse) y segundos después del lanzamiento
+# en los que se usa la habilidad
+ANGLE_RANGE = (-0.2, 1.2)
+MIN_IMPULSE = 40.0
+POWER_RANGE = (0.2, 0.8)
+BIRD_ORDERS = [
+    ("red", "blue", "yellow"),
+    ("blue", "yellow", "red"),
+    ("yellow", "red", "blue"),
+]
+
+@dataclass(frozen=True)
+class Shot:
+    angle: float
+    impulse: float
+    # Segundos después del lanzamiento en los que se activa la habilidad, None para no usarla
+    power_after: float | None = None
+
+# Una partida completa: nivel, semilla y orden de los pájaros como en App, y los tiros en orden
+@dataclass(frozen=True)
+class LevelJob:
+    level: int
+    seed: int
+    shots: tuple[Shot, ...]
+    bird_order: tuple[str, ...] | None = None
+
+# Una fila por partida. settle_times y shot_kills tienen una columna por tiro:
+# NaN y 0 si el tiro no se llegó a hacer.
+def result_dtype(max_shots: int) -> np.dtype:
+    return np.dtype([
+        ("won", np.bool_),
+        ("pigs", np.int32),
+        ("pigs_killed", np.int32),
+        ("shots_fired", np.int32),
+        ("time", np.float64),
+        ("settle_times", np.float64, (max_shots,)),
+        ("shot_kills", np.int32, (max_shots,)),
+    ])
+
+# Cada proceso reusa los objetos de una partida para la siguiente
+JOB_POOL = EntityPool()
+
+# Jugar los tiros de una partida sin ventana y anotar el resultado en su fila
+def play_job(job: LevelJob, row, pool: EntityPool | None = None, wait: float = RESULT_TIMEOUT):
+    bird_order = list(job.bird_order) if job.bird_order is not None else None
+    simulation = Simulation(job.level, seed=job.seed, bird_order=bird_order, pool=pool)
+    pigs = len(simulation.pigs)
+    row["settle_times"] = np.nan
+    row["shot_kills"] = 0
+    shots_fired = 0
+    for shot in job.shots:
+        if simulation.ended or not simulation.birds:
+            break
+        simulation.wait_for_spawn()
+        pigs_before = len(simulation.pigs)
+        launch_time = simulation.time
+        simulation.launch(ImpulseVector(shot.angle, shot.impulse))
+        simulation.settled = False
+        power_time = None if shot.power_after is None else launch_time + shot.power_after
+        while not simulation.ended and not simulation.settled and simulation.time - launch_time < wait:
+            if power_time is not None and simulation.time >= power_time:
+                simulation.power_up()
+                power_time = None
+            simulation.step()
+        row["settle_times"][shots_fired] = simulation.time - launch_time
+        row["shot_kills"][shots_fired] = pigs_before - len(simulation.pigs)
+        shots_fired += 1
+    # Después del último pájaro el resultado se decide cuando todo se queda quieto, como en App
+    while simulation.waiting_for_result and not simulation.ended:
+        simulation.step()
+
+    row["won"] = simulation.won
+    row["pigs"] = pigs
+    row["pigs_killed"] = pigs - len(simulation.pigs)
+    row["shots_fired"] = shots_fired
+    row["time"] = simulation.time
+    simulation.dispose()
+
+# Los procesos escriben directo en la memoria compartida, así los resultados no se copian de vuelta
+_results: np.ndarray | None = None
+_memory: shared_memory.SharedMemory | None = None
+
+def _attach(name: str, dtype: np.dtype, count: int):
+    global _results, _memory
+    _memory = shared_memory.SharedMemory(name=name)
+    _results = np.ndarray(count, dtype=dtype, buffer=_memory.buf)
+
+def _play(batch: list[tuple[int, LevelJob]]):
+    for index, job in batch:
+        play_job(job, _results[index], JOB_POOL)
+
+# Correr muchas partidas independientes repartidas entre varios procesos.
+# Devuelve un arreglo con una fila por partida, en el mismo orden que jobs.
+def run_jobs(jobs: list[LevelJob], max_workers: int | None = None, chunksize: int = 8) -> np.ndarray:
+    dtype = result_dtype(max((len(job.shots) for job in jobs), default=1) or 1)
+    if not jobs:
+        return np.zeros(0, dtype=dtype)
+    memory = shared_memory.SharedMemory(create=True, size=dtype.itemsize * len(jobs))
+    try:
+        results = np.ndarray(len(jobs), dtype=dtype, buffer=memory.buf)
+        indexed = list(enumerate(jobs))
+        batches = [indexed[i:i + chunksize] for i in range(0, len(indexed), chunksize)]
+        logger.debug("Jugando %d partidas en %d tandas", len(jobs), len(batches))
+        with ProcessPoolExecutor(max_workers, initializer=_attach, initargs=(memory.name, dtype, len(jobs))) as executor:
+            for _ in executor.map(_play, batches):
+                pass
+        # Copiar antes de soltar la memoria compartida
+        copy = results.copy()
+        del results
+        return copy
+    finally:
+        memory.close()
+        memory.unlink()
+
+# Un tiro al azar que un jugador puede hacer con el pájaro: el punto arrastrado queda dentro del
+# alcance de la cuerda y arriba del piso
+def random_shot(rng: random.Random, bird: str) -> Shot:
+    angle = rng.uniform(*ANGLE_RANGE)
+    impulse = rng.uniform(MIN_IMPULSE, max_impulse(angle, BIRD_SPECS[bird].radius))
+    return Shot(angle, impulse, rng.uniform(*POWER_RANGE))
+
+# Tiros al azar, uno por pájaro en orden, pero siempre los mismos para la misma semilla
+def random_shots(rng: random.Random, bird_order: tuple[str, ...]) -> tuple[Shot, ...]:
+    return tuple(random_shot(rng, bird) for bird in bird_order)
+
+def make_jobs(levels: list[int], bird_orders: list[tuple[str, ...]], seeds: int, seed: int = 0) -> list[LevelJob]:
+    jobs = []
+    for level in levels:
+        for bird_order in bird_orders:
+            for job_seed in range(seed, seed + seeds):
+                rng = random.Random(f"{level}-{'-'.join(bird_order)}-{job_seed}")
+                jobs.append(LevelJob(level, job_seed, random_shots(rng, bird_order), bird_order))
+    return jobs
+
+# Victorias, cerdos muertos y tiempos de acomodo agrupados por nivel y orden de pájaros
+def summarize(jobs: list[LevelJob], results: np.ndarray) -> list[dict]:
+    groups: dict[tuple, list[int]] = {}
+    for index, job in enumerate(jobs):
+        groups.setdefault((job.level, job.bird_order), []).append(index)
+    summary = []
+    for (level, bird_order), indices in groups.items():
+        rows = results[indices]
+        settle_times = rows["settle_times"][~np.isnan(rows["settle_times"])]
+        summary.append({
+            "level": level,
+            "birds": ",".join(bird_order) if bird_order else "random",
+            "runs": len(rows),
+            "win_rate": float(rows["won"].mean()),
+            "pigs_killed": float(rows["pigs_killed"].mean()),
+            "pigs": int(rows["pigs"].max()),
+            "settle_mean": float(settle_times.mean()) if len(settle_times) else 0.0,
+            "settle_max": float(settle_times.max()) if len(settle_times) else 0.0,
+        })
+    return summary
+
+def parse_bird_order(value: str) -> tuple[str, ...]:
+    names = tuple(value.split(","))
+    for name in names:
+        if name not in BIRD_SPECS:
+            raise argparse.ArgumentTypeError(f"Pájaro desconocido: {name}")
+    return names
+
+def main():
+    parser = argparse.ArgumentParser(description="Jugar muchas partidas sin ventana en varios procesos")
+    parser.add_argument("--levels", type=int, nargs="*", help="niveles a jugar (por defecto todos)")
+    parser.add_argument("--orders", type=parse_bird_order, nargs="+", default=BIRD_ORDERS, help="órdenes como red,blue,yellow")
+    parser.add_argument("--seeds", type=int, default=20, help="partidas con tiros al azar por nivel y orden")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    levels = args.levels if args.levels is not None else level_numbers()
+    jobs = make_jobs(levels, args.orders, args.seeds, args.seed)
+    results = run_jobs(jobs, args.workers)
+    print(f"{'nivel':>5} {'pájaros':<18} {'partidas':>8} {'victorias':>9} {'cerdos':>9} {'acomodo':>8} {'máx':>6}")
+    for row in summarize(jobs, results):
+        print(
+            f"{row['level']:>5} {row['birds']:<18} {row['runs']:>8} {row['win_rate']:>9.0%} "
+            f"{row['pigs_killed']:>5.1f}/{row['pigs']:<3} {row['settle_mean']:>7.2f}s {row['settle_max']:>5.1f}s"
+        )
+    print(f"Total: {int(results['won'].sum())} victorias en {len(results)} partidas, "
+          f"{statistics.fmean(results['pigs_killed']) if len(results) else 0:.2f} cerdos por partida")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import time
+from dataclasses import dataclass
+from logging import getLogger
+
+import arcade
+
+from assets import get_sound
+
+logger = getLogger(__name__)
+
+# Voces que pueden sonar a la vez entre todos los efectos
+MAX_VOICES = 8
+
+PIG_DEATH = "assets/msc/pig-death.mp3"
+SLING_STRETCH = "assets/msc/slingshot-streched.mp3"
+LEVEL_COMPLETED = "assets/msc/level-completed.mp3"
+ERROR = "assets/msc/error.mp3"
+
+# Cuántas copias del mismo sonido pueden sonar juntas, cuánto esperar entre una y otra
+# y qué tan importante es al quitarle la voz a otro sonido cuando no quedan libres
+@dataclass(frozen=True)
+class SoundRule:
+    max_instances: int = 2
+    cooldown: float = 0.05
+    priority: int = 0
+    volume: float = 1.0
+
+DEFAULT_RULE = SoundRule()
+SOUND_RULES = {
+    PIG_DEATH: SoundRule(max_instances=3, cooldown=0.08, priority=2),
+    "assets/msc/red-bird-flying.mp3": SoundRule(max_instances=2, cooldown=0.1, priority=1, volume=0.7),
+    "assets/msc/blue-bird-flying.mp3": SoundRule(max_instances=2, cooldown=0.1, priority=1, volume=0.7),
+    "assets/msc/yellow-bird-flying.mp3": SoundRule(max_instances=2, cooldown=0.1, priority=1, volume=0.7),
+    SLING_STRETCH: SoundRule(max_instances=1, cooldown=0.15),
+    LEVEL_COMPLETED: SoundRule(max_instances=1, cooldown=0.0, priority=3, volume=0.5),
+    ERROR: SoundRule(max_instances=1, cooldown=0.2, priority=1, volume=0.6),
+}
+
+@dataclass
+class Voice:
+    path: str
+    player: object
+    priority: int
+    started: float
+    ends: float
+
+# Reproduce efectos con una cantidad fija de voces. Si se piden muchos a la vez, por ejemplo
+# cuando se derrumba una estructura entera, se descartan o se cortan los menos importantes.
+class SoundMixer:
+    def __init__(self, max_voices: int = MAX_VOICES, clock=time.perf_counter):
+        self.max_voices = max_voices
+        self.clock = clock
+        self.voices: list[Voice] = []
+        self.last_played: dict[str, float] = {}
+
+    def play(self, path: str):
+        now = self.clock()
+        rule = SOUND_RULES.get(path, DEFAULT_RULE)
+        if now - self.last_played.get(path, -rule.cooldown) < rule.cooldown:
+            return None
+        # Las voces que ya terminaron quedan libres
+        self.voices = [voice for voice in self.voices if voice.ends > now]
+        if sum(1 for voice in self.voices if voice.path == path) >= rule.max_instances:
+            return None
+        if len(self.voices) >= self.max_voices:
+            # Se corta la voz menos importante y, entre esas, la más vieja
+            victim = min(self.voices, key=lambda voice: (voice.priority, voice.started))
+            if victim.priority > rule.priority:
+                return None
+            self.voices.remove(victim)
+            arcade.stop_sound(victim.player)
+
+        sound = get_sound(path)
+        player = arcade.play_sound(sound, volume=rule.volume)
+        if player is None:
+            return None
+        self.voices.append(Voice(path, player, rule.priority, now, now + sound.get_length()))
+        self.last_played[path] = now
+        return player
+
+    def stop_all(self):
+        for voice in self.voices:
+            arcade.stop_sound(voice.player)
+        self.voices.clear()
+
+# Un solo mezclador de efectos para todo el juego
+SFX = SoundMixer()
@@ -0,0 +1,71 @@
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from logging import getLogger
+
+from entities import BIRD_SPECS, EntityPool
+from game_logic import ImpulseVector, max_impulse
+from simulation import Simulation
+
+logger = getLogger(__name__)
+
+# Cada proceso reusa los objetos de un tiro para el siguiente
+SHOT_POOL = EntityPool()
+
+@dataclass
+class ShotResult:
+    angle: float
+    impulse: float
+    pigs_killed: int
+    settle_time: float
+    pig_positions: list[tuple[float, float]]
+    won: bool
+
+# Simular un solo tiro en un espacio nuevo. El impulso se recorta al que se puede lograr arrastrando
+# con ese ángulo, como hace App con el mouse, y el resultado guarda el impulso recortado.
+def simulate_shot(
+    game_level: int,
+    bird: str,
+    angle: float,
+    impulse: float,
+    max_time: float = 10.0,
+    dt: float = 1 / 60.0,
+) -> ShotResult:
+    impulse = min(impulse, max_impulse(angle, BIRD_SPECS[bird].radius))
+    simulation = Simulation(game_level, bird_order=[bird], pool=SHOT_POOL)
+    initial_pigs = len(simulation.pigs)
+    simulation.wait_for_spawn(dt)
+    launch_time = simulation.time
+    simulation.launch(ImpulseVector(angle, impulse))
+
+    while simulation.time - launch_time < max_time:
+        simulation.step(dt)
+        if simulation.settled:
+            break
+
+    result = ShotResult(
+        angle,
+        impulse,
+        initial_pigs - len(simulation.pigs),
+        simulation.time - launch_time,
+        [(pig.body.position.x, pig.body.position.y) for pig in simulation.pigs],
+        not simulation.pigs,
+    )
+    simulation.dispose()
+    return result
+
+def _simulate_shot(args: tuple) -> ShotResult:
+    return simulate_shot(*args)
+
+# Evaluar una cuadrícula de (ángulo, impulso) repartida entre varios procesos
+def sweep_shots(
+    game_level: int,
+    bird: str,
+    grid: list[tuple[float, float]],
+    max_time: float = 10.0,
+    max_workers: int | None = None,
+    chunksize: int = 16,
+) -> list[ShotResult]:
+    jobs = [(game_level, bird, angle, impulse, max_time) for angle, impulse in grid]
+    logger.debug("Simulando %d tiros del nivel %d con el pájaro %s", len(jobs), game_level, bird)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(_simulate_shot, jobs, chunksize=chunksize))
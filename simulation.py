@@ -0,0 +1,525 @@
+import random
+from dataclasses import dataclass, replace
+from itertools import chain
+from logging import getLogger
+from typing import Callable
+
+import pymunk
+
+from entities import (
+    BIRD_SPECS,
+    COLLISION_BIRD,
+    COLLISION_BLOCK,
+    COLLISION_GROUND,
+    COLLISION_PIG,
+    Entity,
+    EntityPool,
+    PIG_SPEC,
+    clear_solver_bias,
+    get_launch_impulse,
+)
+from game_logic import FLOOR_Y, GRAVITY, HEIGHT, WIDTH, SLING_POS, ImpulseVector, Point2D, get_launch_point
+from levels import LevelTemplate, get_level_template
+
+logger = getLogger(__name__)
+
+# Paso fijo de la física y máximo de pasos por frame
+STEP_SIZE = 1 / 60.0
+MAX_SUBSTEPS = 5
+
+# Un cuerpo más lento que esto se considera quieto y se duerme después de SLEEP_TIME segundos
+IDLE_SPEED = 10.0
+SLEEP_TIME = 0.5
+# Espera máxima después del último pájaro si el mundo nunca llega a quedarse quieto
+RESULT_TIMEOUT = 10.0
+# Solo la parte del impulso que supera este valor hace daño, así los contactos en reposo,
+# roces y acomodos de la estructura no matan a los cerdos
+DAMAGE_THRESHOLD = 300
+# Segundos al inicio del nivel en los que los cerdos no reciben daño mientras la estructura se acomoda.
+# La gracia termina antes si se lanza un pájaro, así los golpes de un tiro temprano sí cuentan.
+SPAWN_GRACE = 1.0
+# Separación vertical de los clones del pájaro azul respecto del original
+CLONE_OFFSETS = (15, -15)
+# Fracción del giro que conservan pájaros y cerdos después de un segundo. Sin esto los círculos
+# ruedan por el piso para siempre y el mundo nunca se queda quieto (en el aire el giro no afecta la trayectoria)
+ROLLING_RESISTANCE = 0.3
+# Debajo de este giro (rad/s) ya no se frena: asignar la velocidad angular despierta al cuerpo
+# en Chipmunk y frenarlo en cada paso no lo dejaría dormirse nunca. Con este giro un pájaro o un cerdo
+# rueda más lento que IDLE_SPEED, así que Chipmunk ya lo puede dormir.
+ROLLING_EPSILON = 0.5
+
+# Posición del pájaro que espera en el tirachinas
+SLING_REST = Point2D(SLING_POS.x - 25, SLING_POS.y + 18)
+
+@dataclass(frozen=True)
+class EntityState:
+    entity: Entity
+    position: tuple[float, float]
+    velocity: tuple[float, float]
+    angle: float
+    angular_velocity: float
+    has_used_power: bool
+    impulse_vector: ImpulseVector | None
+    damage: float
+
+    @classmethod
+    def capture(cls, entity: Entity) -> "EntityState":
+        body = entity.body
+        return cls(
+            entity,
+            tuple(body.position),
+            tuple(body.velocity),
+            body.angle,
+            body.angular_velocity,
+            entity.has_used_power,
+            entity.impulse_vector,
+            entity.damage,
+        )
+
+    def apply(self):
+        body = self.entity.body
+        body.position = self.position
+        body.velocity = self.velocity
+        body.angle = self.angle
+        body.angular_velocity = self.angular_velocity
+        self.entity.has_used_power = self.has_used_power
+        self.entity.impulse_vector = self.impulse_vector
+        self.entity.damage = self.damage
+
+# Estado completo del mundo, solo se puede restaurar en la simulación que lo creó.
+# Restaurar descarta los contactos del paso anterior, así que restaurar dos veces el mismo
+# snapshot da siempre el mismo resultado (restaurar el estado inicial equivale a un nivel nuevo)
+@dataclass(frozen=True)
+class WorldSnapshot:
+    states: tuple[EntityState, ...]
+    birds: tuple[Entity, ...]
+    pigs: tuple[Entity, ...]
+    blocks: tuple[Entity, ...]
+    flying: tuple[Entity, ...]
+    flying_bird: Entity | None
+    steps: int
+    time: float
+    won: bool
+    failed: bool
+    launched: bool
+    waiting_for_result: bool
+    result_timer: float
+    random_state: tuple
+
+# Simulación del nivel sin ventana, sonidos ni sprites
+class Simulation:
+    def __init__(
+        self,
+        game_level: int,
+        seed: int | None = None,
+        bird_order: list[str] | None = None,
+        template: LevelTemplate | None = None,
+        step_size: float = STEP_SIZE,
+        max_substeps: int = MAX_SUBSTEPS,
+        pool: EntityPool | None = None,
+    ):
+        self.game_level = game_level
+        self.step_size = step_size
+        self.max_substeps = max_substeps
+        self.accumulator = 0.0
+        self.template = template if template is not None else get_level_template(game_level)
+        # Siempre hay una semilla para poder grabar y repetir la partida
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+        self.random = random.Random(self.seed)
+        # Los objetos que salen de la simulación vuelven acá y se reusan en lugar de crear cuerpos nuevos
+        self.pool = pool if pool is not None else EntityPool()
+
+        self.space = self.create_space()
+
+        self.birds: list[Entity] = []
+        self.pigs: list[Entity] = []
+        self.blocks: list[Entity] = []
+        self.flying: list[Entity] = []
+        self.flying_bird: Entity | None = None
+        # Objetos creados de antemano para el power-up, todavía fuera del espacio
+        self.reserved: list[Entity] = []
+        # Para encontrar en O(1) el objeto de una forma que chocó
+        self.shape_entities: dict[pymunk.Shape, Entity] = {}
+
+        self.steps = 0
+        self.time = 0.0
+        self.won = False
+        self.failed = False
+        # Ya se lanzó algún pájaro en el nivel
+        self.launched = False
+        self.waiting_for_result = False
+        self.result_timer = 0.0
+        # Chipmunk durmió a todos los cuerpos: estuvieron quietos SLEEP_TIME seguidos
+        self.settled = False
+        # Guardar la pose anterior de cada cuerpo para dibujar entre pasos; sin ventana no hace falta
+        self.interpolate = True
+
+        # Objetos que murieron durante el paso actual, se sacan todos juntos al terminar el paso
+        self.pending_removal: dict[Entity, None] = {}
+        # Se llama con todos los objetos que salieron de la simulación en un mismo paso
+        self.on_remove: Callable[[list[Entity]], None] | None = None
+        # Se llama al comienzo de cada paso, antes de mover los cuerpos
+        self.on_step: Callable[[], None] | None = None
+        # Se llama justo antes de mover los cuerpos en el espacio
+        self.before_space_step: Callable[[], None] | None = None
+
+        self.generate_world(bird_order)
+
+    @property
+    def ended(self) -> bool:
+        return self.won or self.failed
+
+    # Los cerdos todavía no reciben daño porque la estructura se está acomodando
+    @property
+    def spawning(self) -> bool:
+        return not self.launched and self.time < SPAWN_GRACE
+
+    @property
+    def bird_on_sling(self) -> Entity | None:
+        return self.birds[0] if self.birds else None
+
+    def create_space(self) -> pymunk.Space:
+        space = pymunk.Space()
+        space.gravity = (0, GRAVITY)
+        # Los cuerpos quietos se duermen y Chipmunk deja de simularlos hasta que algo los toque
+        space.idle_speed_threshold = IDLE_SPEED
+        space.sleep_time_threshold = SLEEP_TIME
+
+        # Piso
+        floor_body = pymunk.Body(body_type=pymunk.Body.STATIC)
+        floor_shape = pymunk.Segment(floor_body, (0, FLOOR_Y), (WIDTH, FLOOR_Y), 0.0)
+        floor_shape.friction = 100
+        floor_shape.collision_type = COLLISION_GROUND
+        space.add(floor_body, floor_shape)
+
+        self.register_collision_handlers(space)
+        return space
+
+    # Solo los choques con cerdos tienen handler, el resto lo resuelve Chipmunk sin llamar a Python
+    def register_collision_handlers(self, space: pymunk.Space):
+        for other in (COLLISION_BIRD, COLLISION_BLOCK, COLLISION_GROUND):
+            handler = space.add_collision_handler(COLLISION_PIG, other)
+            handler.post_solve = self.pig_collision_handler
+        handler = space.add_collision_handler(COLLISION_PIG, COLLISION_PIG)
+        handler.post_solve = self.pigs_collision_handler
+
+    def generate_world(self, bird_order: list[str] | None = None):
+        for block in self.template.blocks:
+            self.add(self.pool.acquire("block", block.spec, block.x, block.y), self.blocks)
+        for x, y in self.template.pigs:
+            self.add(self.pool.acquire("pig", PIG_SPEC, x, y), self.pigs)
+
+        if bird_order is None:
+            bird_order = ["red", "blue", "yellow"]
+            # Poner los pájaros de forma aleatoria
+            self.random.shuffle(bird_order)
+        self.birds = [self.pool.acquire("bird", BIRD_SPECS[name], SLING_REST.x, SLING_REST.y) for name in bird_order]
+        # Los clones del pájaro azul ya quedan creados, así el power-up no crea cuerpos en pleno vuelo
+        if "blue" in bird_order:
+            self.reserved = self.pool.reserve("bird", BIRD_SPECS["blue"], len(CLONE_OFFSETS))
+
+    def add(self, entity: Entity, entities: list[Entity]):
+        self.space.add(entity.body, entity.shape)
+        entity.in_space = True
+        entity.reset_interpolation()
+        entity.owner = entities
+        entities.append(entity)
+        self.shape_entities[entity.shape] = entity
+
+    def remove(self, entity: Entity):
+        self.remove_many([entity])
+
+    # Sacar varios objetos a la vez: una sola llamada al espacio y una pasada por cada lista afectada
+    def remove_many(self, entities: list[Entity]):
+        entities = [entity for entity in dict.fromkeys(entities) if entity.owner is not None]
+        if not entities:
+            return
+        self.space.remove(*chain.from_iterable((entity.shape, entity.body) for entity in entities))
+
+        owners = {}
+        for entity in entities:
+            owners[id(entity.owner)] = entity.owner
+            entity.owner = None
+            entity.in_space = False
+            self.shape_entities.pop(entity.shape, None)
+        for owner in owners.values():
+            owner[:] = [entity for entity in owner if entity.owner is owner]
+
+        if self.on_remove:
+            self.on_remove(entities)
+        self.pool.release(entities)
+
+    def snapshot(self) -> WorldSnapshot:
+        entities = self.birds + self.blocks + self.pigs + self.flying
+        return WorldSnapshot(
+            tuple(EntityState.capture(entity) for entity in entities),
+            tuple(self.birds),
+            tuple(self.pigs),
+            tuple(self.blocks),
+            tuple(self.flying),
+            self.flying_bird,
+            self.steps,
+            self.time,
+            self.won,
+            self.failed,
+            self.launched,
+            self.waiting_for_result,
+            self.result_timer,
+            self.random.getstate(),
+        )
+
+    def restore(self, snapshot: WorldSnapshot):
+        # Los cuerpos pasan a un espacio nuevo en el mismo orden que al crear el nivel,
+        # así no quedan contactos ni índices del espacio anterior y el resultado es determinista
+        restored = set(state.entity for state in snapshot.states)
+        dropped = []
+        for entity in chain(self.blocks, self.pigs, self.flying):
+            if entity.in_space:
+                self.space.remove(entity.shape, entity.body)
+                entity.in_space = False
+            entity.owner = None
+            if entity not in restored:
+                dropped.append(entity)
+        # Lo que se había creado después del snapshot vuelve al pool y lo que vuelve a la partida sale de él
+        self.pool.discard(restored)
+        self.pool.release(dropped)
+        self.space = self.create_space()
+        clear_solver_bias([state.entity.body for state in snapshot.states], self.pool.scratch)
+        # El estado se aplica antes de agregar los cuerpos porque el índice espacial usa la velocidad
+        for state in snapshot.states:
+            state.apply()
+        for entity in snapshot.blocks + snapshot.pigs + snapshot.flying:
+            self.space.add(entity.body, entity.shape)
+            entity.in_space = True
+            entity.reset_interpolation()
+
+        self.birds = list(snapshot.birds)
+        self.pigs = list(snapshot.pigs)
+        self.blocks = list(snapshot.blocks)
+        self.flying = list(snapshot.flying)
+        self.shape_entities = {}
+        for entities in (self.pigs, self.blocks, self.flying):
+            for entity in entities:
+                entity.owner = entities
+                self.shape_entities[entity.shape] = entity
+        self.flying_bird = snapshot.flying_bird
+        self.steps = snapshot.steps
+        self.time = snapshot.time
+        self.won = snapshot.won
+        self.failed = snapshot.failed
+        self.launched = snapshot.launched
+        self.waiting_for_result = snapshot.waiting_for_result
+        self.result_timer = snapshot.result_timer
+        self.random.setstate(snapshot.random_state)
+        self.pending_removal.clear()
+        self.accumulator = 0.0
+        self.settled = False
+
+    # Copia independiente del estado actual con objetos propios, para probar tiros sin tocar esta partida
+    def fork(self, pool: EntityPool | None = None) -> "Simulation":
+        copy = Simulation(
+            self.game_level,
+            self.seed,
+            bird_order=[],
+            template=LevelTemplate(self.game_level),
+            step_size=self.step_size,
+            max_substeps=self.max_substeps,
+            pool=pool,
+        )
+        copy.template = self.template
+        snapshot = self.snapshot()
+        clones = {
+            state.entity: copy.pool.acquire(state.entity.kind, state.entity.spec, *state.position)
+            for state in snapshot.states
+        }
+        copy.restore(replace(
+            snapshot,
+            states=tuple(replace(state, entity=clones[state.entity]) for state in snapshot.states),
+            birds=tuple(clones[entity] for entity in snapshot.birds),
+            pigs=tuple(clones[entity] for entity in snapshot.pigs),
+            blocks=tuple(clones[entity] for entity in snapshot.blocks),
+            flying=tuple(clones[entity] for entity in snapshot.flying),
+            flying_bird=clones.get(snapshot.flying_bird),
+        ))
+        return copy
+
+    # Devolver todos los objetos al pool para que la próxima simulación los reuse
+    def dispose(self):
+        entities = list(chain(self.blocks, self.pigs, self.flying))
+        if entities:
+            self.space.remove(*chain.from_iterable((entity.shape, entity.body) for entity in entities))
+        for entity in chain(entities, self.birds):
+            entity.in_space = False
+            entity.owner = None
+        self.pool.release(entities + self.birds)
+        self.blocks, self.pigs, self.flying, self.birds = [], [], [], []
+        self.shape_entities = {}
+        self.flying_bird = None
+
+    # Los callbacks corren en medio del paso, así que los cerdos muertos solo se marcan
+    def damage_pig(self, pig: Entity, impulse: float):
+        if self.spawning or pig in self.pending_removal:
+            return
+        pig.damage += impulse - DAMAGE_THRESHOLD
+        if pig.damage >= pig.spec.health:
+            self.pending_removal[pig] = None
+
+    # El primer shape del arbiter siempre es el cerdo
+    def pig_collision_handler(self, arbiter, space, data):
+        impulse_norm = arbiter.total_impulse.length
+        if impulse_norm < DAMAGE_THRESHOLD:
+            return
+        pig = self.shape_entities.get(arbiter.shapes[0])
+        if pig is not None:
+            self.damage_pig(pig, impulse_norm)
+
+    def pigs_collision_handler(self, arbiter, space, data):
+        impulse_norm = arbiter.total_impulse.length
+        if impulse_norm < DAMAGE_THRESHOLD:
+            return
+        for shape in arbiter.shapes:
+            pig = self.shape_entities.get(shape)
+            if pig is not None:
+                self.damage_pig(pig, impulse_norm)
+
+    # Lanzar el pájaro del tirachinas, por defecto desde el punto donde se soltaría la cuerda
+    def launch(self, impulse_vector: ImpulseVector, position: tuple[float, float] | None = None) -> Entity:
+        bird = self.birds.pop(0)
+        if position is None:
+            launch_point = get_launch_point(impulse_vector)
+            position = (launch_point.x, launch_point.y)
+        bird.body.position = position
+        bird.impulse_vector = impulse_vector
+        self.launched = True
+        self.settled = False
+        self.add(bird, self.flying)
+        bird.body.apply_impulse_at_local_point(get_launch_impulse(bird.spec, impulse_vector))
+        self.flying_bird = bird
+
+        if self.birds:
+            self.birds[0].body.position = (SLING_REST.x, SLING_REST.y)
+        else:
+            # Si ya no quedan pájaros, inicia el contador
+            self.waiting_for_result = True
+            self.result_timer = 0.0
+        return bird
+
+    # Usar la habilidad del último pájaro lanzado, devuelve los pájaros nuevos
+    def power_up(self) -> list[Entity]:
+        bird = self.flying_bird
+        if bird is None or bird.has_used_power or not bird.in_space:
+            return []
+
+        clones = []
+        if bird.spec.name == "blue" and bird.impulse_vector:
+            for offset in CLONE_OFFSETS:
+                clone = self.pool.acquire("bird", bird.spec, bird.body.position.x, bird.body.position.y + offset)
+                self.add(clone, self.flying)
+                angle_variation = 0.3 if offset > 0 else -0.3
+                clone.impulse_vector = ImpulseVector(
+                    bird.impulse_vector.angle + angle_variation,
+                    bird.impulse_vector.impulse * 0.8
+                )
+                clone.body.apply_impulse_at_local_point(get_launch_impulse(clone.spec, clone.impulse_vector))
+                clones.append(clone)
+            bird.has_used_power = True
+        elif bird.spec.name == "yellow":
+            boost = 1.4
+            current_velocity = bird.body.velocity
+            bird.body.velocity = (current_velocity.x * boost, current_velocity.y * boost)
+            bird.has_used_power = True
+        return clones
+
+    # Avanzar el tiempo de un frame en pasos fijos, devuelve cuánto se avanzó hacia el siguiente paso
+    def advance(self, frame_time: float) -> float:
+        self.accumulator += frame_time
+        substeps = 0
+        while self.accumulator >= self.step_size and substeps < self.max_substeps:
+            self.step()
+            self.accumulator -= self.step_size
+            substeps += 1
+        # Si la máquina no alcanza a simular todo, se descarta el tiempo atrasado
+        if self.accumulator >= self.step_size:
+            self.accumulator %= self.step_size
+        return self.accumulator / self.step_size
+
+    # Un paso se divide en fases para poder medir cada una por separado
+    def step(self, dt: float | None = None):
+        if self.on_step:
+            self.on_step()
+        if dt is None:
+            dt = self.step_size
+        self.prepare_bodies(dt)
+        if self.before_space_step:
+            self.before_space_step()
+        self.space.step(dt)
+        self.steps += 1
+        self.time += dt
+        self.cull()
+        self.check_result(dt)
+
+    # Los cuerpos dormidos no se mueven, no hace falta revisarlos
+    def prepare_bodies(self, dt: float):
+        rolling = ROLLING_RESISTANCE ** dt
+        for entity in chain(self.blocks, self.pigs, self.flying):
+            body = entity.body
+            if body.is_sleeping:
+                continue
+            if self.interpolate:
+                entity.reset_interpolation()
+            if entity.kind != "block" and abs(body.angular_velocity) > ROLLING_EPSILON:
+                body.angular_velocity *= rolling
+
+    # Juntar los objetos fuera de pantalla y ver si todavía queda algo en movimiento
+    def cull(self):
+        settled = True
+        out_of_bounds = []
+        for entity in chain(self.blocks, self.pigs, self.flying):
+            body = entity.body
+            if body.is_sleeping:
+                continue
+            x, y = body.position
+            if x < 0 or x > WIDTH or y < 0 or y > HEIGHT:
+                out_of_bounds.append(entity)
+            # Un cuerpo lento por un solo paso no alcanza, puede estar empezando a caerse;
+            # el mundo está quieto recién cuando Chipmunk duerme todos los cuerpos
+            else:
+                settled = False
+        self.settled = settled
+        # Removerlos junto con los cerdos que murieron en el paso
+        if self.pending_removal or out_of_bounds:
+            self.remove_many(list(self.pending_removal) + out_of_bounds)
+            self.pending_removal.clear()
+
+    def check_result(self, dt: float):
+        # Verificar si todos los cerdos muertos
+        if not self.pigs and not self.ended:
+            self.won = True
+
+        # Esperar despues de lanzar el último pájaro a que todo se quede quieto, si aún hay cerdos, se considera derrota
+        if self.waiting_for_result and not self.ended:
+            self.result_timer += dt
+            if self.settled or self.result_timer >= RESULT_TIMEOUT:
+                self.waiting_for_result = False
+                if self.pigs:
+                    self.failed = True
+
+    # Dejar que la estructura se acomode antes del primer tiro, como pasa en el juego
+    def wait_for_spawn(self, dt: float | None = None):
+        while self.spawning:
+            self.step(dt)
+
+    # Avanzar la simulación hasta que el nivel termine o se acabe el tiempo
+    def run(self, max_time: float = 30.0, dt: float | None = None) -> bool:
+        while not self.ended and self.time < max_time:
+            self.step(dt)
+        return self.won
+
+    # Lanzar un pájaro y avanzar hasta que todo se quede quieto, o hasta el final si era el último
+    def shoot(self, impulse_vector: ImpulseVector, wait: float = RESULT_TIMEOUT, dt: float | None = None) -> bool:
+        self.wait_for_spawn(dt)
+        self.launch(impulse_vector)
+        end_time = self.time + wait
+        while not self.ended and not self.settled and self.time < end_time:
+            self.step(dt)
+        return self.won
@@ -0,0 +1,225 @@
+import argparse
+import math
+import time
+from dataclasses import dataclass
+from logging import getLogger
+
+from entities import EntityPool
+from game_logic import ImpulseVector, Point2D, get_launch_point, max_impulse
+from simulation import STEP_SIZE, Simulation
+from trajectory import predict_trajectory
+
+logger = getLogger(__name__)
+
+# Ángulos de tiro hacia la derecha, como get_angle_radians desde el punto arrastrado hasta el anclaje
+ANGLE_RANGE = (-0.6, 1.4)
+MIN_IMPULSE = 20.0
+# Cuadrícula gruesa inicial, después se refina alrededor de los mejores tiros
+COARSE_ANGLES = 9
+COARSE_IMPULSES = 4
+REFINE_ROUNDS = 3
+REFINE_KEEP = 3
+# Segundos de simulación como máximo por tiro probado y tiempo real por consulta
+ROLLOUT_TIME = 4.0
+TIME_BUDGET = 0.8
+# Después de llegar a la estructura, el tiro se da por terminado si ningún cerdo recibe daño en este tiempo
+QUIET_TIME = 0.75
+# Un cerdo muerto vale más que cualquier cantidad de daño a los que quedan, ganar vale más que todo
+KILL_SCORE = 1.0
+DAMAGE_SCORE = 0.5
+WIN_SCORE = 10.0
+# Desempate entre tiros que no le hacen nada a ningún cerdo: los que pasan más cerca puntúan más,
+# así la búsqueda fina se acerca a los cerdos aunque la cuadrícula gruesa no haya acertado
+NEAR_SCORE = 0.1
+NEAR_DISTANCE = 50.0
+
+@dataclass(frozen=True)
+class Hint:
+    impulse_vector: ImpulseVector
+    # Dónde soltar el pájaro para hacer este tiro, igual que al arrastrar en App
+    drag_point: Point2D
+    score: float
+    pigs_killed: int
+    won: bool
+    rollouts: int
+    elapsed: float
+
+# Los tiros se redondean para que la búsqueda fina no repita tiros que solo difieren por el redondeo
+def clamp_shot(angle: float, impulse: float, radius: float) -> tuple[float, float]:
+    angle = round(min(max(angle, ANGLE_RANGE[0]), ANGLE_RANGE[1]), 4)
+    return angle, round(min(max(impulse, MIN_IMPULSE), max_impulse(angle, radius)), 2)
+
+# Rectángulo que contiene a todos los cerdos y bloques, agrandado con el radio del pájaro
+def target_box(simulation: Simulation, margin: float) -> tuple[float, float, float, float] | None:
+    entities = simulation.pigs + simulation.blocks
+    if not entities:
+        return None
+    boxes = [entity.shape.bb for entity in entities]
+    return (
+        min(bb.left for bb in boxes) - margin,
+        max(bb.right for bb in boxes) + margin,
+        min(bb.bottom for bb in boxes) - margin,
+        max(bb.top for bb in boxes) + margin,
+    )
+
+# Vuelo libre del tiro: segundos hasta entrar al rectángulo de la estructura (None si nunca entra,
+# entonces no puede tocar nada y no hace falta simularlo) y qué tan cerca pasa del cerdo más cercano
+def free_flight(spec, impulse_vector: ImpulseVector, box, pigs: list, dt: float = STEP_SIZE) -> tuple[float | None, float]:
+    launch_point = get_launch_point(impulse_vector)
+    points = predict_trajectory(spec, impulse_vector, (launch_point.x, launch_point.y), ROLLOUT_TIME, dt, every=1)
+    contact_time = None
+    distance = math.inf
+    for n, (x, y) in enumerate(points, start=1):
+        for pig in pigs:
+            position = pig.body.position
+            distance = min(distance, math.hypot(x - position.x, y - position.y) - pig.spec.radius - spec.radius)
+        if box is not None:
+            left, right, bottom, top = box
+            if left <= x <= right and bottom <= y <= top:
+                contact_time = n * dt
+                break
+    return contact_time, NEAR_SCORE / (1 + max(0.0, distance) / NEAR_DISTANCE)
+
+# Prueba tiros desde un mismo estado. Cada tiro restaura el snapshot de una copia de la partida,
+# así la partida real no cambia y todos los tiros empiezan exactamente igual.
+class ShotSearch:
+    def __init__(self, simulation: Simulation, pool: EntityPool | None = None, rollout_time: float = ROLLOUT_TIME):
+        self.simulation = simulation.fork(pool)
+        self.simulation.interpolate = False
+        self.snapshot = self.simulation.snapshot()
+        self.rollout_time = rollout_time
+        self.bird = self.simulation.bird_on_sling
+        self.box = target_box(self.simulation, self.bird.spec.radius) if self.bird else None
+        self.scores: dict[tuple[float, float], tuple[float, int, bool]] = {}
+        self.rollouts = 0
+
+    # Se corta apenas el pájaro sale de la pantalla, el mundo se queda quieto, se gana el nivel
+    # o pasa QUIET_TIME desde que el pájaro llegó a la estructura sin que ningún cerdo reciba daño
+    def rollout(self, impulse_vector: ImpulseVector, contact_time: float, near: float) -> tuple[float, int, bool]:
+        simulation = self.simulation
+        simulation.restore(self.snapshot)
+        self.rollouts += 1
+        pigs = len(simulation.pigs)
+        bird = simulation.launch(impulse_vector)
+        simulation.settled = False
+        end_time = simulation.time + self.rollout_time
+        quiet_until = simulation.time + contact_time + QUIET_TIME
+        progress = (pigs, 0.0)
+        while not simulation.won and simulation.time < min(end_time, quiet_until):
+            simulation.step()
+            if not bird.in_space or simulation.settled:
+                break
+            current = (len(simulation.pigs), sum(pig.damage for pig in simulation.pigs))
+            if current != progress:
+                progress = current
+                quiet_until = simulation.time + QUIET_TIME
+        killed = pigs - len(simulation.pigs)
+        damage = sum(min(1.0, pig.damage / pig.spec.health) for pig in simulation.pigs)
+        score = killed * KILL_SCORE + damage * DAMAGE_SCORE + (WIN_SCORE if simulation.won else 0.0) + near
+        return score, killed, simulation.won
+
+    def evaluate(self, angle: float, impulse: float) -> tuple[float, int, bool]:
+        key = (angle, impulse)
+        if key not in self.scores:
+            impulse_vector = ImpulseVector(angle, impulse)
+            contact_time, near = free_flight(self.bird.spec, impulse_vector, self.box, self.simulation.pigs, self.simulation.step_size)
+            if contact_time is None:
+                self.scores[key] = (near, 0, False)
+            else:
+                self.scores[key] = self.rollout(impulse_vector, contact_time, near)
+        return self.scores[key]
+
+    # Cuadrícula gruesa y después cuadrículas cada vez más finas alrededor de los mejores tiros.
+    # Si se acaba el tiempo se devuelve el mejor tiro encontrado hasta ese momento.
+    def search(self, time_budget: float | None = TIME_BUDGET) -> Hint | None:
+        if self.bird is None or self.simulation.ended:
+            return None
+        start = time.perf_counter()
+        deadline = None if time_budget is None else start + time_budget
+        radius = self.bird.spec.radius
+
+        angle_step = (ANGLE_RANGE[1] - ANGLE_RANGE[0]) / (COARSE_ANGLES - 1)
+        candidates = []
+        for i in range(COARSE_ANGLES):
+            angle = ANGLE_RANGE[0] + i * angle_step
+            top = max_impulse(angle, radius)
+            for j in range(COARSE_IMPULSES):
+                candidates.append(clamp_shot(angle, top * (j + 1) / COARSE_IMPULSES, radius))
+        impulse_step = max_impulse(0.0, radius) / COARSE_IMPULSES
+
+        best = []
+        won = False
+        for round_number in range(REFINE_ROUNDS + 1):
+            for angle, impulse in candidates:
+                if self.scores and deadline is not None and time.perf_counter() > deadline:
+                    break
+                # Un tiro que gana el nivel no se puede mejorar, no hace falta seguir buscando
+                if self.evaluate(angle, impulse)[2]:
+                    won = True
+                    break
+            ranked = sorted(self.scores.items(), key=lambda item: item[1][0], reverse=True)
+            best = ranked[:REFINE_KEEP]
+            if won or round_number == REFINE_ROUNDS or (deadline is not None and time.perf_counter() > deadline):
+                break
+            angle_step /= 2
+            impulse_step /= 2
+            candidates = [
+                clamp_shot(angle + da * angle_step, impulse + di * impulse_step, radius)
+                for (angle, impulse), _ in best
+                for da in (-1, 0, 1)
+                for di in (-1, 0, 1)
+                if da or di
+            ]
+
+        (angle, impulse), (score, killed, won) = best[0]
+        impulse_vector = ImpulseVector(angle, impulse)
+        elapsed = time.perf_counter() - start
+        logger.debug("Mejor tiro %.3f rad, %.1f con puntaje %.2f en %d simulaciones (%.0f ms)", angle, impulse, score, self.rollouts, elapsed * 1000)
+        return Hint(impulse_vector, get_launch_point(impulse_vector), score, killed, won, self.rollouts, elapsed)
+
+    def dispose(self):
+        self.simulation.dispose()
+
+# Cada proceso reusa los objetos de una consulta para la siguiente
+HINT_POOL = EntityPool()
+
+# Mejor tiro para el pájaro en la resortera, sin modificar la simulación que se pasa
+def hint(simulation: Simulation, time_budget: float | None = TIME_BUDGET) -> Hint | None:
+    search = ShotSearch(simulation, HINT_POOL)
+    try:
+        return search.search(time_budget)
+    finally:
+        search.dispose()
+
+def main():
+    parser = argparse.ArgumentParser(description="Buscar el mejor tiro para el pájaro en la resortera")
+    parser.add_argument("level", type=int)
+    parser.add_argument("--seed", type=int, default=0, help="semilla del orden de los pájaros")
+    parser.add_argument("--birds", help="orden de los pájaros, como red,blue,yellow")
+    parser.add_argument("--budget", type=float, default=TIME_BUDGET, help="segundos por consulta (0 sin límite)")
+    parser.add_argument("--play", action="store_true", help="jugar el nivel entero siguiendo las pistas")
+    args = parser.parse_args()
+
+    bird_order = args.birds.split(",") if args.birds else None
+    simulation = Simulation(args.level, seed=args.seed, bird_order=bird_order)
+    simulation.wait_for_spawn()
+    while simulation.bird_on_sling is not None and not simulation.ended:
+        bird = simulation.bird_on_sling.spec.name
+        result = hint(simulation, args.budget or None)
+        vector = result.impulse_vector
+        print(
+            f"{bird:<7} ángulo {vector.angle:6.3f}  impulso {vector.impulse:6.1f}  "
+            f"soltar en ({result.drag_point.x:.0f}, {result.drag_point.y:.0f})  "
+            f"cerdos {result.pigs_killed}  puntaje {result.score:5.2f}  "
+            f"{result.rollouts} simulaciones en {result.elapsed * 1000:.0f} ms"
+        )
+        if not args.play:
+            return
+        # Las pruebas empiezan desde el estado recién restaurado, sin los contactos del paso anterior;
+        # la partida se pone en ese mismo estado para que el tiro haga exactamente lo que se probó
+        simulation.restore(simulation.snapshot())
+        simulation.shoot(vector)
+    print("Nivel ganado" if simulation.won else f"Nivel perdido, quedan {len(simulation.pigs)} cerdos")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+from logging import getLogger
+
+import arcade
+import numpy as np
+import pymunk
+import pymunk.batch
+
+from simulation import Simulation
+
+logger = getLogger(__name__)
+
+POSE_FIELDS = pymunk.batch.BodyFields.BODY_ID | pymunk.batch.BodyFields.POSITION | pymunk.batch.BodyFields.ANGLE
+
+# Id, posición y ángulo de todos los cuerpos del espacio con una sola llamada a Chipmunk.
+# Devuelve los ids ordenados y las poses en el mismo orden para buscarlos con searchsorted.
+def read_poses(space: pymunk.Space, buffer: pymunk.batch.Buffer) -> tuple[np.ndarray, np.ndarray]:
+    buffer.clear()
+    pymunk.batch.get_space_bodies(space, POSE_FIELDS, buffer)
+    ids = np.frombuffer(buffer.int_buf(), dtype=np.uintp)
+    poses = np.frombuffer(buffer.float_buf(), dtype=np.float64).reshape(-1, 3)
+    # Indexar con el orden copia los datos, así el buffer se puede reutilizar en la próxima lectura
+    order = np.argsort(ids)
+    return ids[order], poses[order]
+
+# Fila de cada id en un arreglo de ids ordenados, -1 si el cuerpo no está
+def find_rows(sorted_ids: np.ndarray, ids: np.ndarray) -> np.ndarray:
+    if not len(sorted_ids):
+        return np.full(len(ids), -1)
+    rows = np.searchsorted(sorted_ids, ids)
+    rows[rows >= len(sorted_ids)] = 0
+    rows[sorted_ids[rows] != ids] = -1
+    return rows
+
+# SpriteList que cuenta los cambios de sus sprites, así saber si cambió cuesta lo mismo con
+# diez sprites que con diez mil
+class TrackedSpriteList(arcade.SpriteList):
+    def __init__(self, *args, **kwargs):
+        self.version = 0
+        super().__init__(*args, **kwargs)
+
+    def append(self, sprite):
+        super().append(sprite)
+        self.version += 1
+
+    def extend(self, sprites):
+        super().extend(sprites)
+        self.version += 1
+
+    def insert(self, index, sprite):
+        super().insert(index, sprite)
+        self.version += 1
+
+    def remove(self, sprite):
+        super().remove(sprite)
+        self.version += 1
+
+    def pop(self, index: int = -1):
+        sprite = super().pop(index)
+        self.version += 1
+        return sprite
+
+    def clear(self, *args, **kwargs):
+        super().clear(*args, **kwargs)
+        self.version += 1
+
+# Sprites con cuerpo de una lista y la última pose que se les asignó, se recalculan solo
+# cuando cambia la versión de la lista
+class SpriteListBinding:
+    def __init__(self, sprite_list: TrackedSpriteList):
+        self.sprite_list = sprite_list
+        self.version = -1
+        self.sprites: list[arcade.Sprite] = []
+        self.body_ids = np.empty(0, dtype=np.uintp)
+        self.written = np.empty((0, 3))
+
+    def refresh(self):
+        if self.sprite_list.version == self.version:
+            return
+        self.version = self.sprite_list.version
+        self.sprites = [sprite for sprite in self.sprite_list if getattr(sprite, "body", None) is not None]
+        self.body_ids = np.array([sprite.body.id for sprite in self.sprites], dtype=np.uintp)
+        # NaN nunca es igual a nada, así todos los sprites se escriben en la próxima sincronización
+        self.written = np.full((len(self.sprites), 3), np.nan)
+
+# Copia las poses de todos los cuerpos a los sprites. Qué cuerpos se movieron se calcula de una vez
+# para toda la lista y solo a esos sprites se les asigna la posición y el ángulo; los que están quietos
+# o dormidos, que en una estructura en pie son casi todos, no se tocan.
+class BodySpriteSync:
+    def __init__(self, simulation: Simulation, sprite_lists: list[TrackedSpriteList]):
+        self.simulation = simulation
+        self.bindings = [SpriteListBinding(sprite_list) for sprite_list in sprite_lists]
+        self.buffer = pymunk.batch.Buffer()
+        # Poses justo antes del último paso de física, para interpolar
+        self.previous_ids, self.previous_poses = read_poses(simulation.space, self.buffer)
+        simulation.before_space_step = self.capture_previous
+
+    def capture_previous(self):
+        self.previous_ids, self.previous_poses = read_poses(self.simulation.space, self.buffer)
+
+    def sync(self, alpha: float):
+        ids, poses = read_poses(self.simulation.space, self.buffer)
+        current = poses
+        if len(self.previous_ids):
+            previous_rows = find_rows(self.previous_ids, ids)
+            # Un cuerpo que entró al espacio después del último paso no tiene pose anterior
+            previous = np.where((previous_rows >= 0)[:, None], self.previous_poses[previous_rows], poses)
+            current = previous + (poses - previous) * alpha
+
+        for binding in self.bindings:
+            binding.refresh()
+            if not len(binding.body_ids):
+                continue
+            rows = find_rows(ids, binding.body_ids)
+            found = rows >= 0
+            pose = np.where(found[:, None], current[rows], binding.written)
+            pose[:, 2] = np.degrees(pose[:, 2])
+            changed = np.flatnonzero(found & np.any(pose != binding.written, axis=1))
+            if not len(changed):
+                continue
+            binding.written[changed] = pose[changed]
+            sprites = binding.sprites
+            for index, (x, y, angle) in zip(changed.tolist(), pose[changed].tolist()):
+                sprite = sprites[index]
+                sprite.position = (x, y)
+                sprite.angle = angle
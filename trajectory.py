@@ -0,0 +1,50 @@
+from functools import lru_cache
+from logging import getLogger
+
+from entities import BirdSpec, get_launch_impulse
+from game_logic import FLOOR_Y, GRAVITY, HEIGHT, SLING_ANCHOR, WIDTH, ImpulseVector, Point2D, get_impulse_vector
+from simulation import STEP_SIZE
+
+logger = getLogger(__name__)
+
+# La vista previa se recalcula solo cuando el mouse cambia de celda de este tamaño en píxeles
+DRAG_QUANTUM = 2.0
+PREVIEW_CACHE_SIZE = 1024
+# Segundos de vuelo que se dibujan y cada cuántos pasos de física se pone un punto
+PREVIEW_TIME = 2.0
+PREVIEW_EVERY = 3
+
+# Trayectoria de un pájaro recién lanzado mientras no choque con nada.
+# Usa las mismas cuentas que Chipmunk en cada paso (primero mueve con la velocidad actual y después
+# le suma la gravedad), así los puntos caen exactamente donde va a pasar el pájaro en la simulación.
+def predict_trajectory(
+    spec: BirdSpec,
+    impulse_vector: ImpulseVector,
+    position: tuple[float, float],
+    duration: float = PREVIEW_TIME,
+    dt: float = STEP_SIZE,
+    every: int = PREVIEW_EVERY,
+) -> list[tuple[float, float]]:
+    vx, vy = get_launch_impulse(spec, impulse_vector) / spec.mass
+    x, y = position
+    gravity_step = GRAVITY * dt
+    points = []
+    for n in range(1, int(duration / dt) + 1):
+        x += vx * dt
+        y += vy * dt
+        vy += gravity_step
+        if x < 0 or x > WIDTH or y < FLOOR_Y + spec.radius or y > HEIGHT:
+            break
+        if n % every == 0:
+            points.append((x, y))
+    return points
+
+@lru_cache(maxsize=PREVIEW_CACHE_SIZE)
+def _cached_trajectory(spec: BirdSpec, cell_x: int, cell_y: int) -> tuple[tuple[float, float], ...]:
+    position = Point2D(cell_x * DRAG_QUANTUM, cell_y * DRAG_QUANTUM)
+    impulse_vector = get_impulse_vector(position, SLING_ANCHOR)
+    return tuple(predict_trajectory(spec, impulse_vector, (position.x, position.y)))
+
+# Trayectoria para el pájaro soltado en el punto arrastrado, igual que al soltar el mouse en App
+def trajectory_preview(spec: BirdSpec, drag_point: Point2D) -> tuple[tuple[float, float], ...]:
+    return _cached_trajectory(spec, round(drag_point.x / DRAG_QUANTUM), round(drag_point.y / DRAG_QUANTUM))
@@ -0,0 +1,78 @@
+import math
+from logging import getLogger
+
+import arcade
+
+logger = getLogger(__name__)
+
+# Lado de cada celda de la grilla en píxeles, del orden del tamaño de un botón
+CELL_SIZE = 100
+
+# Grilla de celdas fijas: cada objeto se guarda en todas las celdas que toca su rectángulo,
+# así buscar qué hay bajo un punto solo mira una celda sin importar cuántos objetos haya
+class SpatialHash:
+    def __init__(self, cell_size: float = CELL_SIZE):
+        self.cell_size = cell_size
+        self.cells: dict[tuple[int, int], list] = {}
+
+    def cell(self, x: float, y: float) -> tuple[int, int]:
+        return math.floor(x / self.cell_size), math.floor(y / self.cell_size)
+
+    def insert(self, item, left: float, right: float, bottom: float, top: float):
+        first_x, first_y = self.cell(left, bottom)
+        last_x, last_y = self.cell(right, top)
+        for cell_x in range(first_x, last_x + 1):
+            for cell_y in range(first_y, last_y + 1):
+                self.cells.setdefault((cell_x, cell_y), []).append(item)
+
+    # Objetos cuyo rectángulo puede contener el punto, en el orden en que se agregaron
+    def query(self, x: float, y: float) -> list:
+        return self.cells.get(self.cell(x, y), [])
+
+    def clear(self):
+        self.cells.clear()
+
+# Botones de una vista con su tamaño normal y al pasar el mouse por encima.
+# El botón bajo el mouse se recuerda, así la escala solo cambia al entrar o salir de un botón.
+class ButtonLayer:
+    def __init__(self, cell_size: float = CELL_SIZE):
+        self.grid = SpatialHash(cell_size)
+        self.scales: dict[arcade.Sprite, tuple[float, float]] = {}
+        self.hovered: arcade.Sprite | None = None
+
+    def add(self, button: arcade.Sprite, base_scale: float, hover_scale: float):
+        button.scale = base_scale
+        self.scales[button] = (base_scale, hover_scale)
+        # El rectángulo en la grilla es el del botón agrandado, así cubre las dos escalas
+        scale = max(base_scale, hover_scale)
+        half_width = button.texture.width * scale / 2
+        half_height = button.texture.height * scale / 2
+        self.grid.insert(
+            button,
+            button.center_x - half_width,
+            button.center_x + half_width,
+            button.center_y - half_height,
+            button.center_y + half_height,
+        )
+
+    def clear(self):
+        self.grid.clear()
+        self.scales.clear()
+        self.hovered = None
+
+    # Si dos botones se tocan, gana el que se agregó primero
+    def button_at(self, x: float, y: float) -> arcade.Sprite | None:
+        for button in self.grid.query(x, y):
+            if button.collides_with_point((x, y)):
+                return button
+        return None
+
+    def hover(self, x: float, y: float) -> arcade.Sprite | None:
+        button = self.button_at(x, y)
+        if button is not self.hovered:
+            if self.hovered is not None:
+                self.hovered.scale = self.scales[self.hovered][0]
+            if button is not None:
+                button.scale = self.scales[button][1]
+            self.hovered = button
+        return button